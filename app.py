@@ -1,58 +1,141 @@
-import gradio as gr
+import time
+STARTED = time.perf_counter()
+
 import os
-from core.generator import build_3d_model
+import threading
+import core
+from core.server import serve_in_background
+from core.workers import BuildPool
 
 
 # ===============================
-# Generate Function
+# Build Backend
 # ===============================
 
-def generate_model(user_prompt):
+# WTP_WORKERS / WTP_QUEUE_SIZE / WTP_BUILD_TIMEOUT configure the pool;
+# worker processes start on the first build or during warm-up
+build_pool = BuildPool.from_env()
+
+
+def generator():
+    # Loads core.generator (numpy, trimesh) on first use, not at import
+    return core.get_generator(backend=build_pool)
 
-    try:
-        # Build model
-        glb_path, stl_path = build_3d_model({}, user_prompt)
 
-        print("Generated GLB:", glb_path)
-        print("Generated STL:", stl_path)
-        print("GLB Exists:", os.path.exists(glb_path))
-        print("STL Exists:", os.path.exists(stl_path))
+def warm_up():
+    # After the server is listening. Each worker tessellates its own
+    # templates (_init_worker); here we only load the generator module
+    workers = build_pool.warm()
+    generator()
+    print(f"🔥 Warm after {time.perf_counter() - STARTED:.2f}s ({len(workers)} workers)")
 
-        if not os.path.exists(glb_path):
-            return None, None, "❌ GLB file not generated"
 
-        return glb_path, stl_path, "✅ Model Generated Successfully"
+# ===============================
+# Generate Function
+# ===============================
+
+def generate_model(user_prompt):
+
+    try:
+        # Partial layouts while the preview builds, then the coarse preview,
+        # medium and full detail; identical concurrent requests share one
+        # build per level. Medium and full GLB/STL are offered for download
+        viewer_path = None
+        medium_files = None
+
+        for level, result in generator().generate_stream({}, user_prompt):
+            if level == "partial":
+                print(f"Partial {result['stage']} after {result['elapsed']}s:", result["glb"])
+                yield (result["glb"], medium_files, None,
+                       f"⏳ Laying out {result['stage'].replace('_', ' ')} "
+                       f"({result['triangles']} triangles) | {queue_status()}")
+                continue
+
+            glb_path, stl_path = result["glb"], result["stl"]
+            source = "cached" if result["cached"] else result["role"]
+
+            # Say so when a level is drawn with proxies or missed its budget
+            detail = f"{result['triangles']} triangles"
+            if result["proxy"]:
+                detail += f", {result['proxy']} proxies"
+            if result["over_budget"]:
+                detail += f", over the {result['triangle_budget']} budget"
+
+            print(f"Generated {level} GLB:", glb_path, f"({detail})")
+            print(f"Generated {level} STL:", stl_path)
+            print(f"{level.title()} stages:", result["stages"])
+
+            if not os.path.exists(glb_path):
+                yield None, None, None, f"❌ {level.title()} GLB file not generated"
+                return
+
+            if level != "full":
+                # The viewer keeps the lighter GLB; full detail is for download
+                viewer_path = glb_path
+                if level == "medium":
+                    medium_files = [glb_path, stl_path]
+                yield (viewer_path, medium_files, None,
+                       f"⏳ {level.title()} ready ({detail}, {source}), "
+                       f"building full detail... | {queue_status()}")
+                continue
+
+            print("Primitive cache:", result["primitives"] or "cached result")
+            print("Result cache:", generator().results.stats())
+            print("Single-flight:", result["role"], generator().flights.stats())
+            print("Build pool:", build_pool.stats())
+            print("Clashes:", result["clashes"])
+
+            yield (viewer_path or glb_path, medium_files, [glb_path, stl_path],
+                   f"✅ Model Generated Successfully ({result['triangles']} triangles, {source}) "
+                   f"| {queue_status()}")
 
     except Exception as e:
         print("ERROR:", str(e))
-        return None, None, f"❌ Error: {str(e)}"
+        yield None, None, None, f"❌ Error: {str(e)} | {queue_status()}"
+
+
+def queue_status():
+    return f"Queue: {build_pool.depth()}/{build_pool.capacity}"
 
 
 # ===============================
 # Gradio UI
 # ===============================
 
-with gr.Blocks() as demo:
+def build_ui():
+    import gradio as gr
+
+    with gr.Blocks() as demo:
 
-    gr.Markdown("## 🏗️ AI WTP Architect")
+        gr.Markdown("## 🏗️ AI WTP Architect")
 
-    prompt_input = gr.Textbox(
-        label="Enter Plant Capacity (e.g. 100 MLD)",
-        placeholder="Example: 150 MLD WTP"
-    )
+        prompt_input = gr.Textbox(
+            label="Enter Plant Capacity (e.g. 100 MLD)",
+            placeholder="Example: 150 MLD WTP"
+        )
 
-    generate_btn = gr.Button("Generate")
+        generate_btn = gr.Button("Generate")
 
-    status = gr.Textbox(label="Status")
+        status = gr.Textbox(label="Status")
 
-    model_output = gr.Model3D(label="3D Preview")
-    file_output = gr.File(label="Download STL")
+        model_output = gr.Model3D(label="3D Preview")
+        medium_output = gr.File(label="Download Medium Detail (GLB/STL)", file_count="multiple")
+        file_output = gr.File(label="Download Full Detail (GLB/STL)", file_count="multiple")
 
-    generate_btn.click(
-        fn=generate_model,
-        inputs=prompt_input,
-        outputs=[model_output, file_output, status]
-    )
+        generate_btn.click(
+            fn=generate_model,
+            inputs=prompt_input,
+            outputs=[model_output, medium_output, file_output, status],
+            concurrency_limit=build_pool.capacity
+        )
+
+    demo.queue(max_size=build_pool.capacity)
+    return demo
+
+
+# Build workers import this script again as __mp_main__ (forkserver);
+# they need neither gradio nor the UI
+demo = build_ui() if __name__ != "__mp_main__" else None
 
 
 # ===============================
@@ -60,4 +143,14 @@ with gr.Blocks() as demo:
 # ===============================
 
 if __name__ == "__main__":
-    demo.launch(server_name="0.0.0.0", server_port=7860)
+    # Headless bytes API next to the UI, only when WTP_API_PORT is set
+    api = serve_in_background(generator)
+    if api:
+        host, port = api.server_address[:2]
+        print("Model API:", f"http://{host}:{port}/model.glb")
+
+    demo.launch(server_name="0.0.0.0", server_port=7860, prevent_thread_lock=True)
+    print(f"🚀 Listening after {time.perf_counter() - STARTED:.2f}s")
+
+    threading.Thread(target=warm_up, name="wtp-warm-up", daemon=True).start()
+    demo.block_thread()
@@ -0,0 +1,181 @@
+"""
+Benchmark suite for SimpleCADGenerator.build_3d_model.
+
+Runs a capacity sweep that covers every train_count bucket (plus optional
+large-plant cases), each case in a fresh subprocess so peak RSS is not
+shared between cases. Per case it records wall time (median of --repeat
+runs, cold first run reported separately), peak RSS, triangle and vertex
+counts and GLB/STL byte sizes, and writes everything to a JSON file.
+
+    python benchmark.py                                  # sweep -> bench_results.json
+    python benchmark.py --large-trains 50 200            # add large-plant cases
+    python benchmark.py --output baseline.json           # store a baseline
+    python benchmark.py --compare baseline.json          # exit 1 on regressions
+
+Runs offline; only numpy/trimesh and the standard library are needed.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+import statistics
+
+
+DEFAULT_CAPACITIES = [10, 50, 100, 150, 250, 300, 400, 1000, 2000]
+
+# Metrics compared against a baseline; larger is worse for all of them
+METRICS = ["wall_s", "peak_rss_mb", "triangles", "vertices", "glb_bytes", "stl_bytes"]
+
+
+# ============================================================
+# SINGLE CASE (runs in a child process)
+# ============================================================
+
+def run_case(case, repeat):
+    from core.generator import SimpleCADGenerator
+
+    export_dir = tempfile.mkdtemp(prefix="wtp_bench_")
+    try:
+        generator = SimpleCADGenerator(export_dir=export_dir)
+        params = generator.design_params(case["prompt"], case.get("json_params"))
+
+        # The generator's own fresh-build path (clash pass, GLB settings and
+        # all), bypassing the result cache
+        times, runs = [], []
+        for i in range(repeat):
+            start = time.perf_counter()
+            (glb_path, stl_path), report = generator._build(params, f"bench_{i}")
+            times.append(time.perf_counter() - start)
+            runs.append(report["stages"])
+
+        return {
+            "name": case["name"],
+            "trains": params["trains"],
+            "cold_s": round(times[0], 4),
+            "wall_s": round(statistics.median(times), 4),
+            # Median seconds per build stage, next to the wall time
+            "stages": {name: round(statistics.median(run.get(name, 0.0) for run in runs), 6)
+                       for name in runs[0]},
+            # ru_maxrss is reported in KiB on Linux
+            "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "triangles": report["triangles"],
+            "vertices": report["vertices"],
+            "glb_bytes": os.path.getsize(glb_path),
+            "stl_bytes": os.path.getsize(stl_path) if stl_path else 0
+        }
+    finally:
+        shutil.rmtree(export_dir, ignore_errors=True)
+
+
+# ============================================================
+# SWEEP
+# ============================================================
+
+def build_cases(capacities, large_trains):
+    cases = [{"name": f"{mld}_mld", "prompt": f"{mld} MLD WTP"} for mld in capacities]
+    for trains in large_trains:
+        cases.append({
+            "name": f"large_{trains}_trains",
+            "prompt": "",
+            "json_params": {"large_plant": True, "trains": trains}
+        })
+    return cases
+
+
+def run_sweep(cases, repeat):
+    results = []
+    for case in cases:
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__),
+             "--case", json.dumps(case), "--repeat", str(repeat)],
+            capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"Case {case['name']} failed:\n{proc.stderr}")
+
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        results.append(result)
+        print(f"{result['name']:>18}  {result['wall_s'] * 1000:8.1f} ms  "
+              f"{result['peak_rss_mb']:7.1f} MB  {result['triangles']:>9} tris  "
+              f"{result['glb_bytes'] / 1e3:8.1f} kB glb  {result['stl_bytes'] / 1e3:9.1f} kB stl",
+              file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """List of (case, metric, baseline, current) that grew past threshold"""
+    previous = {r["name"]: r for r in baseline["results"]}
+    regressions = []
+
+    for result in results:
+        old = previous.get(result["name"])
+        if old is None:
+            continue
+        for metric in METRICS:
+            before, after = old.get(metric), result.get(metric)
+            if before is None or after is None:
+                continue
+            # Timings get a small absolute floor so sub-millisecond noise never fails
+            floor = 0.005 if metric == "wall_s" else 0
+            if after > before * (1 + threshold) + floor:
+                regressions.append((result["name"], metric, before, after))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="build_3d_model benchmark suite")
+    parser.add_argument("--capacities", type=int, nargs="*", default=DEFAULT_CAPACITIES)
+    parser.add_argument("--large-trains", type=int, nargs="*", default=[])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="allowed relative growth per metric (default 0.15)")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(json.loads(args.case), args.repeat)))
+        return 0
+
+    results = run_sweep(build_cases(args.capacities, args.large_trains), args.repeat)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "repeat": args.repeat,
+        "results": results
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+    if not args.compare:
+        return 0
+
+    with open(args.compare) as f:
+        baseline = json.load(f)
+
+    regressions = compare(results, baseline, args.threshold)
+    for name, metric, before, after in regressions:
+        print(f"❌ {name}: {metric} {before} -> {after}", file=sys.stderr)
+
+    if regressions:
+        return 1
+
+    print(f"✅ No regressions against {args.compare}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
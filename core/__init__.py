@@ -1,11 +1,35 @@
 # core/__init__.py
-from .generator import build_3d_model, SimpleCADGenerator
-from .engine import get_cad_code, extract_mld_from_prompt, extract_number_from_prompt
+# Public names load their module on first access (PEP 562), so importing
+# core stays cheap: numpy/trimesh come in with the first build
+import importlib
+
+_EXPORTS = {
+    'build_3d_model': 'generator',
+    'get_generator': 'generator',
+    'SimpleCADGenerator': 'generator',
+    'get_cad_code': 'engine',
+    'extract_mld_from_prompt': 'engine',
+    'extract_number_from_prompt': 'engine'
+}
 
 __all__ = [
-    'build_3d_model', 
-    'SimpleCADGenerator', 
-    'get_cad_code', 
+    'build_3d_model',
+    'get_generator',
+    'SimpleCADGenerator',
+    'get_cad_code',
     'extract_mld_from_prompt',
     'extract_number_from_prompt'
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,358 @@
+import os
+import sys
+import json
+import time
+import struct
+import hashlib
+import argparse
+import numpy as np
+
+from .gltf import glb_bounds, glb_triangle_count, read_glb_json
+from .prompt import parse_prompt
+from .stl import STL_DTYPE
+
+
+# Catalog lives next to the files it indexes
+CATALOG_NAME = ".wtp_catalog.npy"
+MODEL_EXTENSIONS = (".stl", ".glb")
+
+# Flag bits
+EMPTY = 1
+UNREADABLE = 2
+DUPLICATE = 4
+FLAG_NAMES = {EMPTY: "empty", UNREADABLE: "unreadable", DUPLICATE: "duplicate"}
+
+# Triangles per memmap slice for bounds; bytes per slice for hashing
+BOUNDS_CHUNK = 1 << 20
+HASH_CHUNK = 8 << 20
+
+
+def catalog_dtype(name_bytes):
+    # name is UTF-8, sized to the longest name in the catalog
+    return np.dtype([
+        ("name", f"S{max(name_bytes, 1)}"),
+        ("kind", "S3"),
+        ("size", "<i8"),
+        ("mtime_ns", "<i8"),
+        ("meta_mtime_ns", "<i8"),
+        ("mld", "<f4"),
+        ("triangles", "<i8"),
+        ("lower", "<f4", (3,)),
+        ("upper", "<f4", (3,)),
+        ("digest", "S16"),
+        ("flags", "u1")
+    ])
+
+
+# ============================================================
+# FILE READERS
+# ============================================================
+
+def read_stl(path, size):
+    """(triangles, lower, upper, flags) of a binary STL via numpy.memmap"""
+    if size < 84:
+        return 0, None, None, EMPTY if size == 0 else UNREADABLE
+
+    with open(path, "rb") as f:
+        f.seek(80)
+        count = struct.unpack("<I", f.read(4))[0]
+
+    # ASCII or truncated files do not match the binary record layout
+    if size != 84 + count * STL_DTYPE.itemsize:
+        return 0, None, None, UNREADABLE
+    if count == 0:
+        return 0, None, None, EMPTY
+
+    records = np.memmap(path, dtype=STL_DTYPE, mode="r", offset=84, shape=(count,))
+    lower = np.full(3, np.inf, dtype=np.float32)
+    upper = np.full(3, -np.inf, dtype=np.float32)
+    for start in range(0, count, BOUNDS_CHUNK):
+        corners = records["vertices"][start:start + BOUNDS_CHUNK].reshape(-1, 3)
+        lower = np.minimum(lower, corners.min(axis=0))
+        upper = np.maximum(upper, corners.max(axis=0))
+    del records
+
+    return count, lower, upper, 0
+
+
+def read_glb(path, size):
+    """(triangles, lower, upper, flags) of a GLB from its JSON chunk only"""
+    if size == 0:
+        return 0, None, None, EMPTY
+    try:
+        tree = read_glb_json(path)
+        triangles = glb_triangle_count(path)
+        bounds = glb_bounds(tree)
+    except (ValueError, KeyError, IndexError, struct.error):
+        return 0, None, None, UNREADABLE
+
+    if triangles == 0 or bounds is None:
+        return triangles, None, None, EMPTY
+    return triangles, bounds[0], bounds[1], 0
+
+
+def content_digest(path, size):
+    # 128-bit BLAKE2b over memmapped slices, never the whole file at once
+    digest = hashlib.blake2b(digest_size=16)
+    if size:
+        data = np.memmap(path, dtype=np.uint8, mode="r")
+        for start in range(0, size, HASH_CHUNK):
+            digest.update(data[start:start + HASH_CHUNK])
+        del data
+    return digest.digest()
+
+
+def sidecar(directory, stem):
+    """Run metadata next to a model: {stem}.json or {stem}_params.json"""
+    for name in (f"{stem}.json", f"{stem}_params.json"):
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def sidecar_capacity(path):
+    # "mld" when recorded, else the capacity in the prompt
+    try:
+        with open(path, encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(meta, dict):
+        return None
+    if isinstance(meta.get("mld"), (int, float)):
+        return float(meta["mld"])
+    return parse_prompt(str(meta.get("prompt", ""))).capacity
+
+
+# ============================================================
+# ARCHIVE
+# ============================================================
+
+class ExportArchive:
+    """Incremental catalog of the STL/GLB files in an exports directory.
+
+    scan() re-reads only files whose size or mtime (or sidecar mtime)
+    changed; queries run on the loaded catalog without touching the files.
+    Empty, unreadable and byte-identical duplicate files are flagged for
+    pruning (the oldest copy of a duplicate set is kept).
+    """
+
+    def __init__(self, directory, catalog_path=None):
+        self.directory = directory
+        self.catalog_path = catalog_path or os.path.join(directory, CATALOG_NAME)
+        self.catalog = self.load()
+
+    def load(self):
+        if not os.path.exists(self.catalog_path):
+            return np.zeros(0, dtype=catalog_dtype(1))
+        try:
+            return np.load(self.catalog_path, allow_pickle=False)
+        except (OSError, ValueError):
+            # Unreadable catalog: rebuilt by the next scan
+            return np.zeros(0, dtype=catalog_dtype(1))
+
+    def save(self):
+        # Write then rename, so readers never see a half-written catalog
+        temp = f"{self.catalog_path}.tmp"
+        with open(temp, "wb") as f:
+            np.save(f, self.catalog, allow_pickle=False)
+        os.replace(temp, self.catalog_path)
+
+    # ============================================================
+    # SCAN
+    # ============================================================
+
+    def scan(self):
+        started = time.perf_counter()
+        previous = {row["name"].decode(): row for row in self.catalog}
+
+        rows = []
+        parsed = reused = 0
+        with os.scandir(self.directory) as entries:
+            models = sorted((entry for entry in entries
+                             if entry.is_file()
+                             and entry.name.lower().endswith(MODEL_EXTENSIONS)),
+                            key=lambda entry: entry.name)
+
+        for entry in models:
+            stat = entry.stat()
+            stem, extension = os.path.splitext(entry.name)
+            meta = sidecar(self.directory, stem)
+            meta_mtime = os.stat(meta).st_mtime_ns if meta else 0
+
+            old = previous.get(entry.name)
+            if (old is not None and old["size"] == stat.st_size
+                    and old["mtime_ns"] == stat.st_mtime_ns
+                    and old["meta_mtime_ns"] == meta_mtime):
+                rows.append(old.tolist())
+                reused += 1
+                continue
+
+            kind = extension[1:].lower()
+            reader = read_stl if kind == "stl" else read_glb
+            triangles, lower, upper, flags = reader(entry.path, stat.st_size)
+            mld = sidecar_capacity(meta) if meta else None
+
+            rows.append((
+                entry.name.encode(),
+                kind.encode(),
+                stat.st_size,
+                stat.st_mtime_ns,
+                meta_mtime,
+                np.nan if mld is None else mld,
+                triangles,
+                np.full(3, np.nan) if lower is None else lower,
+                np.full(3, np.nan) if upper is None else upper,
+                content_digest(entry.path, stat.st_size),
+                flags
+            ))
+            parsed += 1
+
+        width = max((len(row[0]) for row in rows), default=1)
+        self.catalog = np.array(rows, dtype=catalog_dtype(width))
+        self._flag_duplicates()
+        self.save()
+
+        return {
+            "files": len(rows),
+            "parsed": parsed,
+            "reused": reused,
+            "removed": len(set(previous) - {entry.name for entry in models}),
+            "seconds": round(time.perf_counter() - started, 6)
+        }
+
+    def _flag_duplicates(self):
+        # Same bytes, same kind: keep the oldest, flag the rest
+        catalog = self.catalog
+        catalog["flags"] &= ~np.uint8(DUPLICATE)
+
+        candidates = np.flatnonzero((catalog["flags"] & (EMPTY | UNREADABLE)) == 0)
+        order = candidates[np.lexsort((catalog["name"][candidates],
+                                       catalog["mtime_ns"][candidates],
+                                       catalog["digest"][candidates]))]
+        digests = catalog["digest"][order]
+        repeat = np.zeros(len(order), dtype=bool)
+        repeat[1:] = digests[1:] == digests[:-1]
+        catalog["flags"][order[repeat]] |= np.uint8(DUPLICATE)
+
+    # ============================================================
+    # QUERIES
+    # ============================================================
+
+    def query(self, mld=None, min_mld=None, max_mld=None, kind=None,
+              min_triangles=None, max_triangles=None, flagged=None):
+        """Catalog rows matching every given filter, as dicts"""
+        catalog = self.catalog
+        mask = np.ones(len(catalog), dtype=bool)
+
+        with np.errstate(invalid="ignore"):
+            if mld is not None:
+                mask &= np.isclose(catalog["mld"], mld)
+            if min_mld is not None:
+                mask &= catalog["mld"] >= min_mld
+            if max_mld is not None:
+                mask &= catalog["mld"] <= max_mld
+        if kind is not None:
+            mask &= catalog["kind"] == kind.encode()
+        if min_triangles is not None:
+            mask &= catalog["triangles"] >= min_triangles
+        if max_triangles is not None:
+            mask &= catalog["triangles"] <= max_triangles
+        if flagged is not None:
+            mask &= (catalog["flags"] != 0) == flagged
+
+        return [self._row(row) for row in catalog[mask]]
+
+    def duplicates(self):
+        """{hex digest: [kept name, duplicate names...]} for every duplicate set"""
+        catalog = self.catalog
+        flagged = set(catalog["digest"][(catalog["flags"] & DUPLICATE) != 0].tolist())
+
+        groups = {}
+        usable = catalog[(catalog["flags"] & (EMPTY | UNREADABLE)) == 0]
+        for row in usable[np.lexsort((usable["name"], usable["mtime_ns"]))]:
+            if row["digest"] in flagged:
+                groups.setdefault(row["digest"].hex(), []).append(row["name"].decode())
+        return groups
+
+    def prune_candidates(self):
+        """Paths safe to delete: flagged models, plus the sidecars of empty
+        or unreadable runs that no kept model still uses"""
+        catalog = self.catalog
+        flagged = catalog[catalog["flags"] != 0]
+
+        kept_stems = {os.path.splitext(name.decode())[0]
+                      for name in catalog["name"][catalog["flags"] == 0]}
+        paths = []
+        for row in flagged:
+            name = row["name"].decode()
+            paths.append(os.path.join(self.directory, name))
+
+            stem = os.path.splitext(name)[0]
+            meta = sidecar(self.directory, stem)
+            if meta and row["flags"] & (EMPTY | UNREADABLE) and stem not in kept_stems:
+                paths.append(meta)
+
+        return sorted(set(paths))
+
+    def prune(self):
+        # Deletes prune_candidates(), then rescans
+        removed = []
+        for path in self.prune_candidates():
+            try:
+                os.remove(path)
+                removed.append(path)
+            except OSError:
+                pass
+        self.scan()
+        return removed
+
+    def stats(self):
+        flags = self.catalog["flags"]
+        return {
+            "files": len(self.catalog),
+            "bytes": int(self.catalog["size"].sum()),
+            "triangles": int(self.catalog["triangles"].sum()),
+            **{name: int(np.count_nonzero(flags & bit)) for bit, name in FLAG_NAMES.items()}
+        }
+
+    def _row(self, row):
+        bounded = not np.isnan(row["lower"]).any()
+        name = row["name"].decode()
+        return {
+            "name": name,
+            "path": os.path.join(self.directory, name),
+            "kind": row["kind"].decode(),
+            "size": int(row["size"]),
+            "mld": None if np.isnan(row["mld"]) else float(row["mld"]),
+            "triangles": int(row["triangles"]),
+            "bounds": ([row["lower"].tolist(), row["upper"].tolist()] if bounded else None),
+            "digest": row["digest"].hex(),
+            "flags": [name for bit, name in FLAG_NAMES.items() if row["flags"] & bit]
+        }
+
+
+if __name__ == "__main__":
+    # python -m core.archive exports --min-mld 50 --max-mld 100 [--flagged] [--prune]
+    parser = argparse.ArgumentParser(description="Index and query an exports directory")
+    parser.add_argument("directory", nargs="?", default="exports")
+    parser.add_argument("--mld", type=float)
+    parser.add_argument("--min-mld", type=float)
+    parser.add_argument("--max-mld", type=float)
+    parser.add_argument("--kind", choices=["stl", "glb"])
+    parser.add_argument("--flagged", action="store_true", help="only files flagged for pruning")
+    parser.add_argument("--prune", action="store_true", help="delete flagged files")
+    args = parser.parse_args()
+
+    archive = ExportArchive(args.directory)
+    print(f"📚 Scan: {archive.scan()}", file=sys.stderr)
+
+    if args.prune:
+        for path in archive.prune():
+            print(f"🗑️ Removed {path}", file=sys.stderr)
+
+    rows = archive.query(mld=args.mld, min_mld=args.min_mld, max_mld=args.max_mld,
+                         kind=args.kind, flagged=True if args.flagged else None)
+    sys.stdout.write(json.dumps(rows, indent=2) + "\n")
+    print(f"📊 {archive.stats()}", file=sys.stderr)
@@ -0,0 +1,218 @@
+import copy
+import numpy as np
+
+
+# Per-vertex GLB cost: float32 position (colors are per material, normals
+# are opt-in); per-face: three uint32 indices. Binary STL: 50 bytes/triangle.
+GLB_VERTEX_BYTES = 12
+GLB_FACE_BYTES = 12
+STL_FACE_BYTES = 50
+
+
+def tag(mesh, kind):
+    """Record the component kind of a whole mesh for budget reports"""
+    if mesh is not None:
+        mesh.metadata["components"] = [(kind, len(mesh.vertices), len(mesh.faces))]
+    return mesh
+
+
+class GeometryBuffer:
+    """Flat, growable vertex/face/color buffers shared by the GLB and STL writers"""
+
+    def __init__(self, vertex_capacity=16384, face_capacity=16384):
+        self.vertices = np.empty((vertex_capacity, 3), dtype=np.float32)
+        self.faces = np.empty((face_capacity, 3), dtype=np.int32)
+        self.face_colors = np.empty((face_capacity, 4), dtype=np.uint8)
+
+        self.vertex_count = 0
+        self.face_count = 0
+
+        # Running area-weighted centroid (same definition as Trimesh.centroid)
+        self._area = 0.0
+        self._moment = np.zeros(3, dtype=np.float64)
+
+        # Sub-assemblies placed by translation: [name, sub_buffer, offsets]
+        self.instances = []
+
+        # Contiguous tagged runs, in append order: (kind, train, vertices, faces)
+        self.parts = []
+
+        # Per part: (template mesh, 4x4 placement) when it is one placed
+        # PrimitiveCache template, else None. Placements predate shift.
+        self.templates = []
+        self.shift = np.zeros(3)
+
+    # ============================================================
+    # APPEND
+    # ============================================================
+
+    def add_geometry(self, mesh, kind="other", train=None):
+        # Mirrors trimesh.Scene.add_geometry so helpers can feed either;
+        # tags set by the helpers take precedence over kind
+        if mesh is None:
+            return
+        self.append(mesh.vertices, mesh.faces, mesh.visual.face_colors)
+
+        # Components are (kind, vertices, faces) or (kind, vertices, faces, train)
+        components = mesh.metadata.get("components") or [(kind, len(mesh.vertices), len(mesh.faces))]
+        for component in components:
+            part_train = component[3] if len(component) > 3 and component[3] is not None else train
+            self.parts.append((component[0], part_train, component[1], component[2]))
+
+        templates = mesh.metadata.get("templates")
+        self.templates.extend(templates if templates and len(templates) == len(components)
+                              else [None] * len(components))
+
+    def append(self, vertices, faces, color):
+        vertices = np.asarray(vertices, dtype=np.float64)
+        faces = np.asarray(faces)
+
+        n_vertices = len(vertices)
+        n_faces = len(faces)
+        self._reserve(self.vertex_count + n_vertices, self.face_count + n_faces)
+
+        v0 = self.vertex_count
+        f0 = self.face_count
+
+        self.vertices[v0:v0 + n_vertices] = vertices
+        self.faces[f0:f0 + n_faces] = faces + v0
+        self.face_colors[f0:f0 + n_faces] = color
+
+        self.vertex_count += n_vertices
+        self.face_count += n_faces
+
+        triangles = vertices[faces]
+        areas = 0.5 * np.linalg.norm(
+            np.cross(triangles[:, 1] - triangles[:, 0],
+                     triangles[:, 2] - triangles[:, 0]),
+            axis=1
+        )
+        self._area += areas.sum()
+        self._moment += areas @ triangles.mean(axis=1)
+
+    def add_batch(self, vertices, faces, color, kind, count, template=None, matrices=None):
+        # count equal-sized instances of one template, already concatenated
+        self.append(vertices, faces, color)
+        part = (kind, None, len(vertices) // count, len(faces) // count)
+        self.parts.extend([part] * count)
+        if template is not None and matrices is not None:
+            self.templates.extend((template, matrix) for matrix in matrices)
+        else:
+            self.templates.extend([None] * count)
+
+    def add_instances(self, name, sub_buffer, offsets):
+        # Place one sub-assembly at several offsets without copying its buffers
+        offsets = np.asarray(offsets, dtype=np.float64).reshape(-1, 3)
+        self.instances.append([name, sub_buffer, offsets])
+
+        self._area += sub_buffer._area * len(offsets)
+        self._moment += (sub_buffer._moment * len(offsets)
+                         + sub_buffer._area * offsets.sum(axis=0))
+
+    def _reserve(self, vertex_count, face_count):
+        if vertex_count > len(self.vertices):
+            self.vertices = self._grow(self.vertices, vertex_count)
+        if face_count > len(self.faces):
+            self.faces = self._grow(self.faces, face_count)
+            self.face_colors = self._grow(self.face_colors, face_count)
+
+    @staticmethod
+    def _grow(array, required):
+        capacity = max(required, 2 * len(array))
+        grown = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+
+    # ============================================================
+    # VIEWS
+    # ============================================================
+
+    @property
+    def total_vertices(self):
+        return self.vertex_count + sum(sub.total_vertices * len(offsets)
+                                       for _, sub, offsets in self.instances)
+
+    @property
+    def total_faces(self):
+        return self.face_count + sum(sub.total_faces * len(offsets)
+                                     for _, sub, offsets in self.instances)
+
+    def budget(self):
+        """Triangles, vertices and estimated GLB/STL bytes per kind and per train.
+
+        Instanced sub-assemblies count once per placement for triangles and
+        STL bytes, but their GLB bytes are stored once (split evenly across
+        trains in the per-train table). Untagged plant-level geometry is
+        reported under the "plant" train key.
+        """
+        by_kind = {}
+        by_train = {}
+
+        def add(table, key, triangles, vertices, glb_bytes, stl_bytes):
+            row = table.setdefault(key, {"triangles": 0, "vertices": 0,
+                                         "glb_bytes": 0, "stl_bytes": 0})
+            row["triangles"] += triangles
+            row["vertices"] += vertices
+            row["glb_bytes"] += glb_bytes
+            row["stl_bytes"] += stl_bytes
+
+        for kind, train, n_vertices, n_faces in self.parts:
+            glb_bytes = n_vertices * GLB_VERTEX_BYTES + n_faces * GLB_FACE_BYTES
+            stl_bytes = n_faces * STL_FACE_BYTES
+            add(by_kind, kind, n_faces, n_vertices, glb_bytes, stl_bytes)
+            add(by_train, "plant" if train is None else train,
+                n_faces, n_vertices, glb_bytes, stl_bytes)
+
+        for _, sub, offsets in self.instances:
+            placements = len(offsets)
+            for kind, _, n_vertices, n_faces in sub.parts:
+                glb_bytes = n_vertices * GLB_VERTEX_BYTES + n_faces * GLB_FACE_BYTES
+                stl_bytes = n_faces * STL_FACE_BYTES
+                add(by_kind, kind, n_faces * placements, n_vertices * placements,
+                    glb_bytes, stl_bytes * placements)
+                for i in range(placements):
+                    add(by_train, i, n_faces, n_vertices,
+                        glb_bytes // placements, stl_bytes)
+
+        total = {"triangles": 0, "vertices": 0, "glb_bytes": 0, "stl_bytes": 0}
+        for row in by_kind.values():
+            for field in total:
+                total[field] += row[field]
+
+        return {"by_kind": by_kind, "by_train": by_train, "total": total}
+
+    @property
+    def centroid(self):
+        if self._area == 0:
+            return np.zeros(3)
+        return self._moment / self._area
+
+    def translate(self, offset):
+        offset = np.asarray(offset, dtype=np.float64)
+        self.vertices[:self.vertex_count] += offset.astype(np.float32)
+        self.shift = self.shift + offset
+        for instance in self.instances:
+            instance[2] = instance[2] + offset
+        self._moment += offset * self._area
+
+    def partial(self, placements=None):
+        # Shallow view of everything appended so far, instanced
+        # sub-assemblies cut to their first placements; arrays are shared
+        view = copy.copy(self)
+        view.parts = list(self.parts)
+        view.templates = list(self.templates)
+        view.instances = [[name, sub, offsets[:placements]]
+                          for name, sub, offsets in self.instances]
+        return view
+
+    def tiled(self):
+        # Yield (vertices, faces, face_colors) chunks with instances expanded
+        if self.face_count:
+            yield (self.vertices[:self.vertex_count],
+                   self.faces[:self.face_count],
+                   self.face_colors[:self.face_count])
+
+        for _, sub, offsets in self.instances:
+            for vertices, faces, colors in sub.tiled():
+                for offset in offsets:
+                    yield vertices + offset.astype(np.float32), faces, colors
@@ -0,0 +1,131 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+# Bump whenever the generated geometry changes for the same parameters
+CACHE_VERSION = 5
+
+
+def design_key(params):
+    """Stable content hash for a dict of normalized design parameters"""
+    payload = json.dumps({"version": CACHE_VERSION, "params": params},
+                         sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache:
+    """In-memory LRU in front of a size-bounded on-disk store of GLB/STL outputs"""
+
+    EXTENSIONS = ("glb", "stl")
+
+    def __init__(self, cache_dir, max_entries=64, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ============================================================
+    # LOOKUP
+    # ============================================================
+
+    def paths(self, key, formats=EXTENSIONS):
+        # One slot per extension; None for formats the entry does not hold
+        return tuple(os.path.join(self.cache_dir, f"wtp_{key[:16]}.{ext}")
+                     if ext in formats else None
+                     for ext in self.EXTENSIONS)
+
+    def get(self, key, formats=EXTENSIONS):
+        with self._lock:
+            paths = self._memory.get(key) or self.paths(key, formats)
+
+            if not all(os.path.exists(p) for p in paths if p):
+                self._memory.pop(key, None)
+                self.misses += 1
+                return None
+
+            self._remember(key, paths)
+            for path in paths:
+                if path:
+                    os.utime(path)
+
+            self.hits += 1
+            return paths
+
+    # ============================================================
+    # STORE
+    # ============================================================
+
+    def put(self, key, glb_path, stl_path=None):
+        paths = tuple(dst if src else None
+                      for src, dst in zip((glb_path, stl_path), self.paths(key)))
+
+        # Created on the first store, so lookups alone leave no trace on disk
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Atomic rename: concurrent writers of the same key never see a torn file
+        for src, dst in zip((glb_path, stl_path), paths):
+            if src:
+                os.replace(src, dst)
+
+        with self._lock:
+            self._remember(key, paths)
+            self._evict(keep=paths)
+
+        return paths
+
+    def _remember(self, key, paths):
+        self._memory[key] = paths
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self, keep=()):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.startswith("wtp_") or name.rsplit(".", 1)[-1] not in self.EXTENSIONS:
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+
+        # Least recently used first; hits refresh mtime in get()
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path in keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+
+        stale = [k for k, paths in self._memory.items()
+                 if not all(os.path.exists(p) for p in paths if p)]
+        for k in stale:
+            del self._memory[k]
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "memory_entries": len(self._memory)
+        }
@@ -0,0 +1,249 @@
+import numpy as np
+
+
+# Component tags (see buffers.tag) that are solid equipment; everything
+# here is convex, so it can act as the "solid" side of a narrow-phase test
+EQUIPMENT = {"tank_body", "tank_dome", "block", "ground", "cylinder", "box"}
+
+# Routing is expected to touch other routing at joints; nozzles are
+# fittings mounted on equipment, so they never clash
+ROUTING = {"pipe", "elbow"}
+
+
+class Component:
+    """One tagged run of a GeometryBuffer, in its sub-assembly's frame"""
+
+    def __init__(self, kind, train, vertices, faces):
+        self.kind = kind
+        self.train = train
+        self.vertices = vertices
+        self.faces = faces
+        self.lower = vertices.min(axis=0)
+        self.upper = vertices.max(axis=0)
+        self._edges = None
+        self._planes = None
+
+    @property
+    def edges(self):
+        if self._edges is None:
+            pairs = self.faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2)
+            self._edges = np.unique(np.sort(pairs, axis=1), axis=0)
+        return self._edges
+
+    def planes(self):
+        # Outward face planes (n, d) with n . p <= d inside, plus the box
+        # planes so open shells (domes) are closed off
+        if self._planes is None:
+            triangles = self.vertices[self.faces]
+            normals = np.cross(triangles[:, 1] - triangles[:, 0],
+                               triangles[:, 2] - triangles[:, 0])
+            lengths = np.linalg.norm(normals, axis=1)
+            keep = lengths > 1e-12
+            normals = normals[keep] / lengths[keep, None]
+            offsets = np.einsum("ij,ij->i", normals, triangles[keep, 0])
+
+            axes = np.vstack([np.eye(3), -np.eye(3)])
+            normals = np.vstack([normals, axes])
+            offsets = np.concatenate([offsets, self.upper, -self.lower])
+
+            planes = np.unique(np.round(np.column_stack([normals, offsets]), 9), axis=0)
+            self._planes = planes[:, :3], planes[:, 3]
+        return self._planes
+
+
+def placements(buffer):
+    """Every tagged part of a buffer as (components, index, offsets, trains).
+
+    Instanced sub-assemblies contribute their components once; index and
+    offsets place them (one row per component per placement). trains is -1
+    for plant-level parts.
+    """
+    found = []
+    index, offsets, trains = [], [], []
+
+    def collect(sub, sub_offsets, sub_trains):
+        base = len(found)
+        found.extend(_components(sub))
+        count = len(found) - base
+        if count == 0:
+            return
+        index.append(np.tile(np.arange(base, base + count), len(sub_offsets)))
+        offsets.append(np.repeat(sub_offsets, count, axis=0))
+        own = np.tile([-1 if c.train is None else c.train for c in found[base:]], len(sub_offsets))
+        trains.append(np.where(own >= 0, own, np.repeat(sub_trains, count)))
+
+    collect(buffer, np.zeros((1, 3)), np.array([-1]))
+    for _, sub, sub_offsets in buffer.instances:
+        collect(sub, np.asarray(sub_offsets, dtype=np.float64), np.arange(len(sub_offsets)))
+
+    if not found:
+        return found, np.empty(0, dtype=int), np.empty((0, 3)), np.empty(0, dtype=int)
+    return found, np.concatenate(index), np.vstack(offsets), np.concatenate(trains)
+
+
+def _components(buffer):
+    vertices = buffer.vertices[:buffer.vertex_count].astype(np.float64)
+    faces = buffer.faces[:buffer.face_count]
+
+    found = []
+    v0 = f0 = 0
+    for kind, train, n_vertices, n_faces in buffer.parts:
+        if kind in EQUIPMENT or kind in ROUTING:
+            found.append(Component(kind, train,
+                                   vertices[v0:v0 + n_vertices],
+                                   faces[f0:f0 + n_faces] - v0))
+        v0 += n_vertices
+        f0 += n_faces
+    return found
+
+
+# ============================================================
+# BROAD PHASE
+# ============================================================
+
+def candidate_pairs(lower, upper, chunk=1 << 20):
+    """Index pairs whose boxes overlap: sweep and prune on the sparser axis"""
+    n = len(lower)
+    if n < 2:
+        return np.empty((0, 2), dtype=np.int64)
+
+    best = None
+    for axis in range(3):
+        order = np.argsort(lower[:, axis], kind="stable")
+        ends = np.searchsorted(lower[order, axis], upper[order, axis], side="right")
+        counts = np.maximum(ends - np.arange(1, n + 1), 0)
+        if best is None or counts.sum() < best[2].sum():
+            best = (axis, order, counts)
+
+    axis, order, counts = best
+    first = np.arange(1, n + 1)
+
+    # Expand the sweep ranges in chunks so memory stays bounded
+    pairs = []
+    starts = np.concatenate([[0], np.cumsum(counts)])
+    for lo in range(0, int(starts[-1]), chunk):
+        hi = min(lo + chunk, int(starts[-1]))
+        flat = np.arange(lo, hi)
+        i = np.searchsorted(starts, flat, side="right") - 1
+        j = first[i] + flat - starts[i]
+        a, b = order[i], order[j]
+        overlap = np.all((lower[a] <= upper[b]) & (lower[b] <= upper[a]), axis=1)
+        pairs.append(np.column_stack([a[overlap], b[overlap]]))
+
+    return np.vstack(pairs) if pairs else np.empty((0, 2), dtype=np.int64)
+
+
+# ============================================================
+# NARROW PHASE
+# ============================================================
+
+def penetration(edges_from, solid, shift, tolerance):
+    """Longest stretch of edges_from's edges inside solid (shrunk by tolerance).
+
+    shift moves edges_from into solid's frame. Clips every edge against
+    every plane at once (Cyrus-Beck); returns (length, midpoint in solid's
+    frame) or (0.0, None).
+    """
+    normals, offsets = solid.planes()
+    edges = edges_from.edges
+    p0 = edges_from.vertices[edges[:, 0]] + shift
+    direction = edges_from.vertices[edges[:, 1]] + shift - p0
+
+    num = (offsets - tolerance)[None, :] - p0 @ normals.T
+    den = direction @ normals.T
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = num / den
+    t_enter = np.max(np.where(den < 0, t, 0.0), axis=1, initial=0.0)
+    t_exit = np.min(np.where(den > 0, t, 1.0), axis=1, initial=1.0)
+    parallel_outside = np.any((den == 0) & (num < 0), axis=1)
+
+    inside = np.where(parallel_outside, 0.0, np.clip(t_exit - t_enter, 0.0, None))
+    lengths = inside * np.linalg.norm(direction, axis=1)
+
+    best = int(np.argmax(lengths))
+    if lengths[best] <= 0:
+        return 0.0, None
+    middle = p0[best] + direction[best] * (t_enter[best] + t_exit[best]) / 2
+    return float(lengths[best]), middle
+
+
+def find_clashes(buffer, tolerance=0.0):
+    """Routing through equipment and equipment overlapping equipment.
+
+    Returns dicts with both component kinds and trains (None for
+    plant-level parts), the longest edge length found inside the other
+    solid, and its location. Contacts and embeds shallower than tolerance
+    (connections, stacked parts) are not clashes. Pairs with the same two
+    components at the same relative placement are tested once.
+    """
+    found, index, offsets, trains = placements(buffer)
+    if len(index) < 2:
+        return []
+
+    # Equipment boxes shrink by half the tolerance: still conservative for
+    # routing (tested against the solid shrunk by the full tolerance) and
+    # for equipment pairs (which must overlap by more than the tolerance)
+    equipment = np.array([c.kind in EQUIPMENT for c in found])[index]
+    shrink = np.where(equipment, tolerance / 2, 0.0)[:, None]
+    lower = np.array([c.lower for c in found])[index] + offsets + shrink
+    upper = np.array([c.upper for c in found])[index] + offsets - shrink
+    pairs = candidate_pairs(lower, upper)
+
+    # Solid side first; routing against routing is never a clash
+    swap = ~equipment[pairs[:, 0]]
+    pairs[swap] = pairs[swap][:, ::-1]
+    pairs = pairs[equipment[pairs[:, 0]]]
+    if len(pairs) == 0:
+        return []
+
+    solids, others = pairs[:, 0], pairs[:, 1]
+    shifts = offsets[others] - offsets[solids]
+    keys = np.column_stack([index[solids], index[others], np.round(shifts, 6)])
+    unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+
+    lengths = np.zeros(len(unique))
+    locations = np.zeros((len(unique), 3))
+    for u, (solid, other, *shift) in enumerate(unique):
+        solid, other, shift = found[int(solid)], found[int(other)], np.array(shift)
+        length, location = penetration(other, solid, shift, tolerance)
+        if other.kind in EQUIPMENT:
+            reverse = penetration(solid, other, -shift, tolerance)
+            if reverse[0] > length:
+                length, location = reverse[0], reverse[1] + shift
+        if length > 0:
+            lengths[u], locations[u] = length, location
+
+    inverse = inverse.ravel()
+    hits = np.flatnonzero(lengths[inverse] > 0)
+    solids, others, matched = solids[hits], others[hits], inverse[hits]
+    where = (locations[matched] + offsets[solids]).round(4).tolist()
+    depth = lengths[matched].round(4).tolist()
+    kinds = [c.kind for c in found]
+
+    clashes = []
+    for k, (solid, other) in enumerate(zip(index[solids].tolist(), index[others].tolist())):
+        train_a, train_b = int(trains[others[k]]), int(trains[solids[k]])
+        clashes.append({
+            "a": kinds[other],
+            "b": kinds[solid],
+            "train_a": None if train_a < 0 else train_a,
+            "train_b": None if train_b < 0 else train_b,
+            "length": depth[k],
+            "location": where[k]
+        })
+
+    return clashes
+
+
+def summarize(clashes):
+    """Clash count and longest penetration per pair of kinds"""
+    summary = {}
+    for clash in clashes:
+        row = summary.setdefault(f"{clash['a']} x {clash['b']}",
+                                 {"count": 0, "max_length": 0.0, "location": None})
+        row["count"] += 1
+        if clash["length"] > row["max_length"]:
+            row["max_length"] = clash["length"]
+            row["location"] = clash["location"]
+    return summary
@@ -1,37 +1,40 @@
 import os
-import re
 import json
 import hashlib
 from datetime import datetime
 
+from .prompt import parse_prompt
+
+# Largest count a single repeat pattern may expand to
+MAX_REPEAT = 10000
+
 def extract_mld_from_prompt(prompt):
-    """Extract MLD value from user prompt"""
-    mld_match = re.search(r'(\d+)\s*MLD', prompt, re.IGNORECASE)
-    return int(mld_match.group(1)) if mld_match else 10
+    """Extract MLD value from user prompt (10 if absent)"""
+    mld = parse_prompt(prompt).capacity
+    return mld if mld is not None else 10
 
 def extract_number_from_prompt(prompt, keyword, default):
     """Extract a number following a keyword"""
-    pattern = rf'{keyword}[:\s]*(\d+(?:\.\d+)?)'
-    match = re.search(pattern, prompt, re.IGNORECASE)
-    return float(match.group(1)) if match else default
+    return parse_prompt(prompt).number(keyword, default)
 
 def get_cad_code(user_prompt):
     """Generate REAL water treatment plant components based on prompt"""
     
     print(f"\n🔍 Processing: {user_prompt}")
     
+    # One pass over the prompt: capacity, counts, primitives and plant kind
+    parsed = parse_prompt(user_prompt)
+    
     # Extract MLD for scaling
-    mld = extract_mld_from_prompt(user_prompt)
+    mld = parsed.capacity if parsed.capacity is not None else 10
     scale = (mld/10)**0.5
     
     # Create variation based on prompt
     seed = int(hashlib.md5(user_prompt.encode()).hexdigest()[:8], 16) % 1000
     variation = 0.8 + (seed / 1000.0)  # 0.8 to 1.8 variation
     
-    prompt_lower = user_prompt.lower()
-    
     # ============== COMPLETE WATER TREATMENT PLANT ==============
-    if "complete" in prompt_lower or "full" in prompt_lower or "all units" in prompt_lower:
+    if parsed.kind == "complete":
         print("🏭 Creating COMPLETE WATER TREATMENT PLANT")
         
         # Scale based on MLD
@@ -106,7 +109,7 @@ def get_cad_code(user_prompt):
         }
     
     # ============== INDIVIDUAL COMPONENTS ==============
-    elif "intake" in prompt_lower:
+    elif parsed.kind == "intake":
         print("🏭 Creating INTAKE STRUCTURE")
         params = {
             "type": "intake_structure",
@@ -121,7 +124,7 @@ def get_cad_code(user_prompt):
             ]
         }
     
-    elif "clarifier" in prompt_lower:
+    elif parsed.kind == "clarifier":
         print("🏭 Creating CLARIFIER")
         params = {
             "type": "circular_clarifier",
@@ -138,27 +141,23 @@ def get_cad_code(user_prompt):
             ]
         }
     
-    elif "filter" in prompt_lower:
+    elif parsed.kind == "filter":
         print("🏭 Creating FILTER BANK")
-        num_filters = extract_number_from_prompt(user_prompt, "filters", 4)
+        num_filters = parsed.number("filters", 4)
         num_filters = int(num_filters)
+        if num_filters > MAX_REPEAT:
+            print(f"⚠️ {num_filters} filters requested, capped at {MAX_REPEAT}")
+        num_filters = min(max(num_filters, 1), MAX_REPEAT)
         
-        components = []
-        for i in range(num_filters):
-            components.append({
-                "shape": "box",
-                "width": round(5 * scale, 2),
-                "depth": round(5 * scale, 2),
-                "height": round(4 * scale, 2),
-                "x": round(i * 7 * scale, 2),
-                "y": 0,
-                "z": 0
-            })
-        
+        # One base filter repeated along x: spec size does not grow with N
         params = {
             "type": "rapid_sand_filters",
             "description": f"Bank of {num_filters} rapid sand filters",
-            "components": components,
+            "components": [
+                {"shape": "box", "width": round(5 * scale, 2), "depth": round(5 * scale, 2),
+                 "height": round(4 * scale, 2), "x": 0, "y": 0, "z": 0,
+                 "repeat": {"count": num_filters, "pitch": [round(7 * scale, 2), 0, 0]}}
+            ],
             "piping": [
                 {"shape": "pipe", "radius": round(1.0 * scale, 2), "length": round(num_filters * 7 * scale, 2),
                  "x": round((num_filters-1) * 3.5 * scale, 2), "y": round(3 * scale, 2), "z": round(2 * scale, 2)},
@@ -167,7 +166,7 @@ def get_cad_code(user_prompt):
             ]
         }
     
-    elif "storage" in prompt_lower or "tank" in prompt_lower:
+    elif parsed.kind == "storage":
         print("🏭 Creating STORAGE TANK")
         params = {
             "type": "clear_water_reservoir",
@@ -185,33 +184,29 @@ def get_cad_code(user_prompt):
         }
     
     # ============== SIMPLE PLANT WITH EXPLICIT POSITIONS ==============
-    elif any(x in prompt_lower for x in ["at x=", "position", "x="]):
+    elif parsed.kind == "explicit":
         print("🏭 Creating PLANT WITH EXPLICIT POSITIONS")
         
-        # Parse positions from prompt
+        # Positions come from the parsed prompt
         units = []
         
-        # Look for cylinder patterns
-        cylinder_matches = re.finditer(r'cylinder\s+r=(\d+(?:\.\d+)?)\s+h=(\d+(?:\.\d+)?)\s+at\s+x=(\d+(?:\.\d+)?)', prompt_lower)
-        for match in cylinder_matches:
+        for radius, height, x in parsed.cylinders:
             units.append({
                 "name": "Cylinder",
                 "shape": "cylinder",
-                "radius": float(match.group(1)),
-                "height": float(match.group(2)),
-                "x": float(match.group(3))
+                "radius": radius,
+                "height": height,
+                "x": x
             })
         
-        # Look for box patterns
-        box_matches = re.finditer(r'box\s+w=(\d+(?:\.\d+)?)\s+d=(\d+(?:\.\d+)?)\s+h=(\d+(?:\.\d+)?)\s+at\s+x=(\d+(?:\.\d+)?)', prompt_lower)
-        for match in box_matches:
+        for width, depth, height, x in parsed.boxes:
             units.append({
                 "name": "Box",
                 "shape": "box",
-                "width": float(match.group(1)),
-                "depth": float(match.group(2)),
-                "height": float(match.group(3)),
-                "x": float(match.group(4))
+                "width": width,
+                "depth": depth,
+                "height": height,
+                "x": x
             })
         
         # Sort units by x position
@@ -264,8 +259,8 @@ def get_cad_code(user_prompt):
     params["generated"] = datetime.now().isoformat()
     params["prompt"] = user_prompt
     
-    # Convert to JSON
-    json_str = json.dumps(params, indent=2)
+    # Convert to compact JSON
+    json_str = json.dumps(params, separators=(",", ":"))
     print(f"✅ Generated {params['type']} with {len(params.get('units', []))} units and {len(params.get('connections', []))} connections")
     
     return json_str
@@ -1,54 +1,660 @@
+import io
 import os
+import queue
 import numpy as np
 import trimesh
 from datetime import datetime
-import re
+import math
+import time
+import uuid
+import weakref
 import tempfile
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+
+from . import layout
+from .buffers import GeometryBuffer, tag
+from .cache import ResultCache, design_key
+from .clash import find_clashes, summarize
+from .gltf import glb_bytes, glb_triangle_count, write_glb
+from .parallel import PARALLEL_MIN_FACES, write_stl as parallel_stl
+from .plan import PlanCache, is_spec, load_params, normalize_spec
+from .primitives import PrimitiveCache, align_z, sections_for_radius
+from .prompt import parse_prompt
+from .singleflight import SingleFlight
+from .stl import STL_DTYPE, StreamingSTLWriter, stl_triangle_count
+from .telemetry import RequestLog, StageTimer
+from .workers import OutputTooLarge, process_context
 
 
 class SimpleCADGenerator:
 
-    def __init__(self, export_dir=None):
+    # Large-plant mode defaults (override per request via json_params)
+    LARGE_TRAIN_MLD = 100
+    LARGE_TRAINS_PER_BANK = 10
+    MAX_TRAINS = 1000
+
+    # Level-of-detail set: (name, tolerance multiplier, triangle budget,
+    # formats, quantized GLB, proxies). With proxies, a plant that coarser
+    # tessellation cannot fit is drawn with box proxies per train, then
+    # one box per bank
+    LOD_LEVELS = (
+        ("preview", 4.0, 20000, ("glb",), True, True),
+        ("medium", 2.0, None, ("glb", "stl"), False, False),
+        ("full", 1.0, None, ("glb", "stl"), False, False)
+    )
+
+    FORMATS = ("glb", "stl")
+
+    # Routing may embed this far (x scale) into equipment at a connection:
+    # one branch-pipe radius
+    CLASH_TOLERANCE = 3
+
+    def __init__(self, export_dir=None, cache_dir=None, cache_bytes=512 * 1024 * 1024,
+                 chord_tolerance=0.2, triangle_budget=None, request_log=None,
+                 check_clashes=None, glb_quantize=None, backend=None,
+                 build_processes=None):
         # Render-safe export directory
         self.export_dir = export_dir or tempfile.gettempdir()
         os.makedirs(self.export_dir, exist_ok=True)
 
+        # Max chordal deviation, in plant-scale units (x scale per build)
+        self.chord_tolerance = chord_tolerance
+        self.triangle_budget = triangle_budget
+        self._local = threading.local()
+
+        self.primitives = PrimitiveCache()
+        self.plans = PlanCache()
+        self.results = ResultCache(cache_dir or os.path.join(self.export_dir, "wtp_cache"),
+                                   max_bytes=cache_bytes)
+        self.flights = SingleFlight()
+
+        # Pipe/equipment clash pass on every fresh build (WTP_CLASH_CHECK=0 disables)
+        if check_clashes is None:
+            check_clashes = os.getenv("WTP_CLASH_CHECK", "1") != "0"
+        self.check_clashes = check_clashes
+
+        # KHR_mesh_quantization GLBs by default (WTP_GLB_QUANTIZE=1)
+        if glb_quantize is None:
+            glb_quantize = os.getenv("WTP_GLB_QUANTIZE", "0") == "1"
+        self.glb_quantize = glb_quantize
+
+        # Optional out-of-process builder (see core.workers.BuildPool)
+        self.backend = backend
+
+        # Cores for tiling large plants (WTP_BUILD_PROCESSES); the process
+        # pool starts on the first large export
+        if build_processes is None:
+            build_processes = int(os.getenv("WTP_BUILD_PROCESSES", "1"))
+        self.build_processes = max(1, build_processes)
+        self._tiles = None
+        self._tile_lock = threading.Lock()
+
+        # One JSON line per request: stage timings, triangles, output sizes;
+        # written by a background thread
+        self.request_log = RequestLog(request_log
+                                      or os.getenv("WTP_REQUEST_LOG")
+                                      or os.path.join(self.export_dir, "requests.jsonl"))
+
     # ============================================================
     # MAIN BUILD
     # ============================================================
 
     def build_3d_model(self, json_params, user_prompt=""):
+        result = self.generate(json_params, user_prompt)
+        return result["glb"], result["stl"]
+
+    def generate(self, json_params, user_prompt="", progress=None):
+        # progress(stage, glb_path, triangles) receives partial previews
+        # while a fresh build lays the plant out (leader only)
+        timer = StageTimer()
+
+        with timer.stage("parse"):
+            params = self.design_params(user_prompt, json_params)
+            key = design_key(params)
+
+        # Concurrent requests for the same design share one build
+        (paths, cached, report), leader = self.flights.do(key, self._build_cached,
+                                                          key, params, progress)
+
+        result = {
+            "glb": paths[0],
+            "stl": paths[1],
+            "key": key,
+            "cached": cached,
+            "role": "leader" if leader else "follower",
+            "triangles": (stl_triangle_count(paths[1]) if paths[1]
+                          else glb_triangle_count(paths[0]))
+        }
+
+        stages = timer.rounded()
+        if report:
+            stages.update(report["stages"])
+        result["stages"] = stages
+
+        # Per-component budget, clashes and the builder's template cache
+        # come with fresh builds; budget_report() / clash_report() on demand
+        result["budget"] = report["budget"] if report else None
+        result["clashes"] = report["clashes"] if report else None
+        result["primitives"] = report["primitives"] if report else None
+        result.update(self.budget_status(params, result["triangles"], report))
+        self.log_request(user_prompt, params, result, time.perf_counter() - timer.started)
+
+        return result
+
+    def generate_bytes(self, json_params, user_prompt="", max_trains=None, max_bytes=None):
+        """Like generate(), but GLB/STL come back as in-memory buffers.
+
+        Outputs never touch the export directory or the result cache, and
+        the request log line is handed to the log's background writer, so
+        no file I/O happens on the request path. Identical concurrent
+        requests still share one build. result["glb"] is bytes,
+        result["stl"] bytes or None (json_params formats=["glb"] skips it).
+
+        Each output is held in memory whole, so callers serving untrusted
+        clients should set max_trains (ValueError past it) and max_bytes
+        (OutputTooLarge for any larger output, the STL before it is built).
+        """
+        timer = StageTimer()
+
+        with timer.stage("parse"):
+            params = self.design_params(user_prompt, json_params)
+            key = design_key(params)
+
+        if max_trains and params["trains"] > max_trains:
+            raise ValueError(f"At most {max_trains} trains per request, got {params['trains']}")
+
+        build = self.backend.build_bytes if self.backend else self._build_bytes
+        ((glb, stl), report), leader = self.flights.do(f"{key}:bytes:{max_bytes}", build,
+                                                       params, max_bytes)
+
+        stages = timer.rounded()
+        stages.update(report["stages"])
+        result = {
+            "glb": glb,
+            "stl": stl,
+            "key": key,
+            "cached": False,
+            "role": "leader" if leader else "follower",
+            "triangles": report["triangles"],
+            "stages": stages,
+            "budget": report["budget"],
+            "clashes": report["clashes"],
+            "primitives": report["primitives"]
+        }
+        result.update(self.budget_status(params, report["triangles"], report))
+        self.log_request(user_prompt, params, result, time.perf_counter() - timer.started)
+
+        return result
+
+    def budget_report(self, json_params, user_prompt=""):
+        # Assembles without exporting: per kind / per train triangles and bytes
+        return self.assemble(self.design_params(user_prompt, json_params)).budget()
+
+    def clash_report(self, json_params, user_prompt=""):
+        # Every clash of the assembled plant, in output coordinates
+        params = self.design_params(user_prompt, json_params)
+        buffer = self.center(self.assemble(params))
+        return find_clashes(buffer, self.clash_tolerance(params))
+
+    def budget_status(self, params, triangles, report):
+        # over_budget is known for cached results too; the final tolerance
+        # only for fresh builds
+        budget = params["triangle_budget"]
+        return {
+            "triangle_budget": budget,
+            "over_budget": bool(budget and triangles > budget),
+            "tolerance": report["tolerance"] if report else None,
+            "proxy": report["proxy"] if report else None
+        }
+
+    def clash_tolerance(self, params):
+        # Spec plants only forgive tessellation error; generated layouts also
+        # forgive pipes seated into a wall or nozzle
+        if params["layout"] == "spec":
+            return params["chord_tolerance"] * params["scale"]
+        return self.CLASH_TOLERANCE * params["scale"]
+
+    def log_request(self, user_prompt, params, result, total_s):
+        self.request_log.append({
+            "time": datetime.now().isoformat(timespec="milliseconds"),
+            "prompt": user_prompt,
+            "key": result["key"][:16],
+            "layout": params["layout"],
+            "trains": params["trains"],
+            "role": result["role"],
+            "cached": result["cached"],
+            "total_s": round(total_s, 6),
+            "stages": result["stages"],
+            "triangles": result["triangles"],
+            "triangle_budget": result["triangle_budget"],
+            "over_budget": result["over_budget"],
+            "tolerance": result["tolerance"],
+            "proxy": result["proxy"],
+            "components": ({kind: row["triangles"]
+                            for kind, row in result["budget"]["by_kind"].items()}
+                           if result["budget"] else None),
+            "clashes": (sum(row["count"] for row in result["clashes"].values())
+                        if result["clashes"] is not None else None),
+            "glb_bytes": _size(result["glb"]),
+            "stl_bytes": _size(result["stl"]) if result["stl"] is not None else 0
+        })
+
+    def generate_lods(self, json_params, user_prompt="", progress=None):
+        # Yields (level, result) coarsest first, so a preview can be shown
+        # while the finer levels are still being built; progress applies
+        # to the first level only
+        json_params = load_params(json_params)
+        tolerance, current = self.tessellation_limits(json_params)
+
+        for level, factor, budget, formats, quantize, proxies in self.LOD_LEVELS:
+            level_params = dict(json_params,
+                                chord_tolerance=tolerance * factor,
+                                formats=list(formats),
+                                glb_quantize=json_params.get("glb_quantize", quantize),
+                                proxies=proxies)
+            if budget:
+                level_params["triangle_budget"] = min(budget, current) if current else budget
+
+            result = self.generate(level_params, user_prompt, progress)
+            result["level"] = level
+            progress = None
+            yield level, result
+
+    def generate_stream(self, json_params, user_prompt=""):
+        """generate_lods() with partial previews ahead of the first level.
+
+        Yields ("partial", {"stage", "glb", "triangles", "elapsed"}) as the
+        ground, header and storage and then the trains are laid out, then
+        (level, result) per LOD. Partials only come from fresh builds; their
+        GLBs are deleted once the stream is closed or consumed. Closing the
+        stream early (a cancelled request) lets the first level finish in
+        the background, but every partial it still writes is deleted.
+        """
+        started = time.perf_counter()
+        events = queue.Queue()
+        done = object()
+        first = {}
+
+        # Set on close; checked under the lock so no partial slips past the drain
+        cancel = threading.Event()
+        cancel_lock = threading.Lock()
+
+        def progress(stage, path, triangles):
+            with cancel_lock:
+                if not cancel.is_set():
+                    events.put((stage, path, triangles))
+                    return
+            _remove(path)
+
+        levels = self.generate_lods(json_params, user_prompt, progress=progress)
+
+        def run_first():
+            try:
+                first["item"] = next(levels)
+            except BaseException as e:
+                first["error"] = e
+            finally:
+                events.put(done)
+
+        threading.Thread(target=run_first, name="wtp-stream", daemon=True).start()
+
+        partials = []
+        try:
+            for stage, path, triangles in iter(events.get, done):
+                partials.append(path)
+                yield "partial", {
+                    "stage": stage,
+                    "glb": path,
+                    "triangles": triangles,
+                    "elapsed": round(time.perf_counter() - started, 6)
+                }
+
+            if "error" in first:
+                raise first["error"]
+            yield first["item"]
+            yield from levels
+        finally:
+            with cancel_lock:
+                cancel.set()
+
+            # Queued but never yielded, then everything yielded
+            while True:
+                try:
+                    event = events.get_nowait()
+                except queue.Empty:
+                    break
+                if event is not done:
+                    partials.append(event[1])
+
+            for path in partials:
+                _remove(path)
+
+    def _build_cached(self, key, params, progress=None):
+        cached = self.results.get(key, params["formats"])
+        if cached:
+            return cached, True, None
+
+        build = self.backend.build if self.backend else self._build
+        (glb_path, stl_path), report = build(params, self.output_stem(), progress)
+        return self.results.put(key, glb_path, stl_path), False, report
+
+    def warm_up(self):
+        # Pre-tessellate the templates a default plant uses at every LOD
+        # (no export); returns the seconds spent
+        started = time.perf_counter()
+        params = self.design_params("100 MLD")
+        for _, factor, *_ in self.LOD_LEVELS:
+            self.assemble(dict(params, chord_tolerance=params["chord_tolerance"] * factor))
+        return time.perf_counter() - started
+
+    def design_params(self, user_prompt, json_params=None):
+        # Everything the geometry depends on, normalized for cache keys
+        json_params = load_params(json_params)
+        mld = self.extract_mld(user_prompt)
 
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        scene = trimesh.Scene()
+        tolerance, budget = self.tessellation_limits(json_params)
+        tessellation = {
+            "chord_tolerance": tolerance,
+            "triangle_budget": budget,
+            "formats": self.output_formats(json_params),
+            "glb_quantize": bool(json_params.get("glb_quantize", self.glb_quantize)),
+            "proxies": bool(json_params.get("proxies", False))
+        }
+
+        # core.engine output: build exactly what the spec describes
+        if is_spec(json_params):
+            spec = normalize_spec(json_params)
+            _, plan = self.plans.get(spec)
+            return {
+                "layout": "spec",
+                "mld": json_params.get("capacity_mld", mld),
+                "trains": 0,
+                "spec": spec,
+                # Same relative tolerance as a scale-1 plant, 1500 units deep
+                "scale": plan.extent / 1500,
+                **tessellation
+            }
+
+        large = json_params.get("large_plant") or "large plant" in user_prompt.lower()
+        if not large:
+            return {
+                "layout": "standard",
+                "mld": mld,
+                "trains": self.train_count(mld),
+                "scale": max(1, mld / 80),
+                **tessellation
+            }
+
+        train_mld = _positive_number(json_params.get("train_capacity_mld", self.LARGE_TRAIN_MLD),
+                                     "train_capacity_mld")
+        per_bank = _positive_int(json_params.get("trains_per_bank", self.LARGE_TRAINS_PER_BANK),
+                                 "trains_per_bank")
+        # An explicit trains count wins; otherwise enough trains for the capacity
+        if "trains" in json_params:
+            trains = _positive_int(json_params["trains"], "trains")
+        else:
+            trains = math.ceil(mld / train_mld)
+
+        if not 1 <= trains <= self.MAX_TRAINS:
+            raise ValueError(f"Large-plant mode supports 1 to {self.MAX_TRAINS} trains, got {trains}")
+
+        return {
+            "layout": "large",
+            "mld": mld,
+            "trains": trains,
+            "trains_per_bank": per_bank,
+            "scale": max(1, train_mld / 80),
+            **tessellation
+        }
+
+    def tessellation_limits(self, json_params):
+        # (chord_tolerance, triangle_budget) from json_params or the
+        # generator defaults; both reach the HTTP API through POST params
+        tolerance = json_params.get("chord_tolerance", self.chord_tolerance)
+        budget = json_params.get("triangle_budget", self.triangle_budget)
+
+        tolerance = _positive_number(tolerance, "chord_tolerance")
+        if budget is not None:
+            budget = _positive_int(budget, "triangle_budget")
+        return tolerance, budget
+
+    def output_formats(self, json_params):
+        # The viewer always needs the GLB; STL is optional
+        formats = json_params.get("formats", list(self.FORMATS))
+        if (not isinstance(formats, list) or "glb" not in formats
+                or not set(formats) <= set(self.FORMATS)):
+            raise ValueError(f"formats must be a list of {list(self.FORMATS)} "
+                             f"including \"glb\", got {formats!r}")
+        return sorted(set(formats))
+
+    def output_stem(self):
+        # Microseconds plus a random suffix: same-second requests never collide
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        return f"wtp_{timestamp}_{uuid.uuid4().hex[:8]}"
+
+    def _build(self, params, stem, progress=None):
+        # Returns the output paths and a report with per-stage timings
+        self._local.progress = (stem, progress) if progress else None
+        return self._run_build(params, lambda buffer: self.export(
+            buffer, stem, params["formats"], params["glb_quantize"]))
+
+    def _build_bytes(self, params, max_bytes=None):
+        # Same build, exported to memory: ((glb, stl), report)
+        def export(buffer):
+            # The STL size is exact up front; the instanced GLB is checked after
+            stl_size = 84 + STL_DTYPE.itemsize * buffer.total_faces
+            if max_bytes and "stl" in params["formats"] and stl_size > max_bytes:
+                raise OutputTooLarge(f"STL would be {stl_size} bytes; the limit is {max_bytes}")
+
+            glb, stl = self.export_bytes(buffer, params["formats"], params["glb_quantize"])
+            if max_bytes and len(glb) > max_bytes:
+                raise OutputTooLarge(f"GLB is {len(glb)} bytes; the limit is {max_bytes}")
+            return glb, stl
+
+        return self._run_build(params, export)
+
+    def _run_build(self, params, export):
+        timer = StageTimer()
+        self._local.timer = timer
+        try:
+            buffer = self.assemble(params)
+            with timer.stage("center"):
+                self.center(buffer)
+
+            clashes = None
+            if self.check_clashes:
+                with timer.stage("clash"):
+                    clashes = summarize(find_clashes(buffer, self.clash_tolerance(params)))
+                for pair, row in clashes.items():
+                    print(f"⚠️ Clash {pair}: {row['count']} found, "
+                          f"up to {row['max_length']} deep at {row['location']}")
+
+            budget = params.get("triangle_budget")
+            if budget and buffer.total_faces > budget:
+                print(f"⚠️ Triangle budget {budget} missed: {buffer.total_faces} triangles "
+                      f"at chord tolerance {self._local.built_tolerance:.6g}")
+
+            outputs = export(buffer)
+        finally:
+            self._local.timer = None
+            self._local.progress = None
+
+        return outputs, {
+            "stages": timer.rounded(),
+            "triangles": buffer.total_faces,
+            "vertices": buffer.total_vertices,
+            "tolerance": round(self._local.built_tolerance, 6),
+            "proxy": self._proxy(),
+            "budget": buffer.budget(),
+            "clashes": clashes,
+            # Hit/miss of whichever process built it (a pool worker's, not ours)
+            "primitives": self.primitives.stats()
+        }
+
+    def _stage(self, name):
+        # Times a block against the current build's timer, if any
+        timer = getattr(self._local, "timer", None)
+        return timer.stage(name) if timer else nullcontext()
+
+    def _lap(self, name):
+        timer = getattr(self._local, "timer", None)
+        if timer:
+            timer.lap(name)
+
+    def _partial(self, buffer, stage, placements=None):
+        # Quantized GLB of what is laid out so far, for streaming previews
+        progress = getattr(self._local, "progress", None)
+        if not progress:
+            return
+        stem, callback = progress
+
+        with self._stage("partial_export"):
+            view = buffer.partial(placements)
+            path = os.path.join(self.export_dir, f"{stem}_{stage}.glb")
+            write_glb(view, path, quantize=True)
+        callback(stage, path, view.total_faces)
+
+    def _partial_trains(self, buffer, trains):
+        # Trains appear one by one; past 8, in doubling steps (log N GLBs)
+        if not getattr(self._local, "progress", None):
+            return
+        steps = range(1, trains + 1) if trains <= 8 else sorted(
+            {2 ** i for i in range(trains.bit_length())} | {trains})
+        for count in steps:
+            self._partial(buffer, f"trains_{count}", count)
+
+    def assemble(self, params):
+        tolerance = params["chord_tolerance"] * params["scale"]
+        budget = params.get("triangle_budget")
+        self._local.proxy = None
+
+        # Coarsen until the plant fits the budget; faces ~ tolerance ** -0.5.
+        # Tessellation cannot drop whole components, so a budget below the
+        # plant's minimum is missed: callers see over_budget in the result
+        buffer = self._assemble_layout(params, tolerance)
+        for _ in range(3):
+            if not budget or buffer.total_faces <= budget:
+                break
+            # Partial previews were already streamed on the first pass
+            self._local.progress = None
+            coarser = tolerance * (buffer.total_faces / budget) ** 2
+            rebuilt = self._assemble_layout(params, coarser)
+            # Every curve is at its minimum segment count: coarser cannot help
+            if rebuilt.total_faces >= buffer.total_faces:
+                break
+            buffer, tolerance = rebuilt, coarser
+
+        # Still over: stand in box proxies for the trains, then for banks
+        if budget and params.get("proxies") and params["layout"] != "spec":
+            self._local.progress = None
+            levels = ("train", "bank") if params["layout"] == "large" else ("train",)
+            for proxy in levels:
+                if buffer.total_faces <= budget:
+                    break
+                self._local.proxy = proxy
+                buffer = self._assemble_layout(params, tolerance)
+
+        # Tolerance the plant was finally built at, in chord_tolerance units
+        self._local.built_tolerance = tolerance / params["scale"]
+        return buffer
+
+    def _proxy(self):
+        # "train" or "bank" while a proxy fallback is being assembled
+        return getattr(self._local, "proxy", None)
+
+    def _assemble_layout(self, params, tolerance):
+        self._local.tolerance = tolerance
+        self._lap("setup")
+        try:
+            if params["layout"] == "spec":
+                return self._assemble_spec(params)
+            if params["layout"] == "large":
+                return self._assemble_large(params)
+            return self._assemble_standard(params)
+        finally:
+            self._local.tolerance = None
+
+    def export(self, buffer, stem, formats=("glb", "stl"), quantize=False):
+        # GLB shares one mesh per template and per train, referenced by
+        # nodes; STL streams tiles
+        glb_path = os.path.join(self.export_dir, f"{stem}.glb")
+        with self._stage("glb_export"):
+            write_glb(buffer, glb_path, quantize=quantize)
+
+        stl_path = None
+        if "stl" in formats:
+            stl_path = os.path.join(self.export_dir, f"{stem}.stl")
+            with self._stage("stl_export"):
+                self.write_stl(buffer, stl_path)
 
-        mld = self.extract_mld(user_prompt)
-        trains = self.train_count(mld)
-        scale = max(1, mld / 80)
+        return glb_path, stl_path
+
+    def export_bytes(self, buffer, formats=("glb", "stl"), quantize=False):
+        # export() without the filesystem: (glb bytes, stl bytes or None)
+        with self._stage("glb_export"):
+            glb = glb_bytes(buffer, quantize=quantize)
+
+        stl = None
+        if "stl" in formats:
+            with self._stage("stl_export"):
+                out = io.BytesIO()
+                self.write_stl(buffer, out)
+                stl = out.getvalue()
+
+        return glb, stl
+
+    def write_stl(self, buffer, target):
+        # Large plants fill tiles on build_processes cores through shared
+        # memory; same bytes as the serial stream
+        if self.build_processes > 1 and buffer.total_faces >= PARALLEL_MIN_FACES:
+            parallel_stl(buffer, target, self._tile_pool(), self.build_processes)
+            return
+
+        with StreamingSTLWriter(target) as writer:
+            writer.write_buffer(buffer)
 
-        rack_y = 250 * scale
-        rack_height = 90 * scale
+    def _tile_pool(self):
+        with self._tile_lock:
+            if self._tiles is None:
+                # Started from a request thread: never fork this process.
+                # Shut down with the generator, not left to interpreter exit
+                self._tiles = ProcessPoolExecutor(max_workers=self.build_processes,
+                                                  mp_context=process_context())
+                weakref.finalize(self, self._tiles.shutdown)
+            return self._tiles
 
-        main_pipe = 5 * scale
-        branch_pipe = 3 * scale
+    def _assemble_standard(self, params):
 
-        train_spacing = 400 * scale
+        buffer = GeometryBuffer()
+
+        trains = params["trains"]
+        scale = params["scale"]
+
+        rack_y = layout.RACK_Y * scale
+        rack_height = layout.RACK_HEIGHT * scale
+
+        main_pipe = layout.MAIN_PIPE * scale
+        branch_pipe = layout.BRANCH_PIPE * scale
+
+        train_spacing = layout.TRAIN_SPACING * scale
         base_x = -((trains - 1) / 2) * train_spacing
 
         # ================= GROUND =================
 
         ground = trimesh.creation.box(
-            extents=[train_spacing * trains + 800 * scale,
-                     1500 * scale,
+            extents=[train_spacing * trains + layout.GROUND_MARGIN * scale,
+                     layout.GROUND_DEPTH * scale,
                      20]
         )
         ground.visual.face_colors = [170, 170, 170, 255]
         ground.apply_translation([0, 0, -20])
-        scene.add_geometry(ground)
+        buffer.add_geometry(ground, "ground")
 
         # ================= MAIN HEADER =================
 
-        header_start = base_x - 200 * scale
+        header_start = base_x - layout.HEADER_LEAD * scale
         header_end = base_x + train_spacing * (trains - 1)
 
         header = self.pipe(
@@ -56,88 +662,43 @@ class SimpleCADGenerator:
             [header_end, rack_y, rack_height],
             main_pipe
         )
-        scene.add_geometry(header)
+        buffer.add_geometry(header)
 
         # ================= STORAGE TANK =================
 
-        storage_x = header_end + 350 * scale
-        storage_radius = 50 * scale
-        storage_height = 80 * scale
+        storage_x = header_end + layout.STORAGE_OFFSET * scale
+        storage_radius = layout.STORAGE[0] * scale
+        storage_height = layout.STORAGE[1] * scale
 
         storage = self.tank(storage_x, 0, storage_radius, storage_height)
-        scene.add_geometry(storage)
+        buffer.add_geometry(storage)
 
         train_outputs = []
 
-        # ================= TREATMENT TRAINS =================
-
-        for i in range(trains):
-
-            x = base_x + i * train_spacing
-
-            mixer = self.tank(x, 0, 25 * scale, 60 * scale)
-            clarifier = self.tank(x, -200 * scale, 40 * scale, 50 * scale)
-            filter_block = self.block(x, -400 * scale,
-                                      100 * scale,
-                                      80 * scale,
-                                      40 * scale)
-
-            scene.add_geometry(mixer)
-            scene.add_geometry(clarifier)
-            scene.add_geometry(filter_block)
+        self._lap("ground_header")
+        self._partial(buffer, "ground_header")
 
-            nozzle_z = 45 * scale
-
-            nozzle = self.professional_nozzle(x, 0, nozzle_z, branch_pipe)
-            scene.add_geometry(nozzle)
-
-            drop = self.pipe(
-                [x, rack_y, rack_height],
-                [x, rack_y - 100 * scale, rack_height],
-                branch_pipe
-            )
-            scene.add_geometry(drop)
-
-            elbow1 = self.elbow_90(
-                [x, rack_y - 100 * scale, rack_height],
-                branch_pipe,
-                axis="z"
-            )
-            scene.add_geometry(elbow1)
-
-            vertical = self.pipe(
-                [x, rack_y - 100 * scale, rack_height],
-                [x, rack_y - 100 * scale, nozzle_z],
-                branch_pipe
-            )
-            scene.add_geometry(vertical)
+        # ================= TREATMENT TRAINS =================
 
-            horizontal = self.pipe(
-                [x, rack_y - 100 * scale, nozzle_z],
-                [x, 0, nozzle_z],
-                branch_pipe
-            )
-            scene.add_geometry(horizontal)
+        # Every train is identical up to x: build it once and place it N times
+        if self._proxy():
+            train = self.train_proxy(scale)
+        else:
+            train = self.train_assembly(scale, rack_y, rack_height, branch_pipe)
+        self._lap("train_assembly")
 
-            pipe_mc = self.pipe(
-                [x, 0, nozzle_z],
-                [x, -200 * scale, 40 * scale],
-                branch_pipe
-            )
-            scene.add_geometry(pipe_mc)
+        train_x = [base_x + i * train_spacing for i in range(trains)]
+        buffer.add_instances("train", train, [[tx, 0, 0] for tx in train_x])
 
-            pipe_cf = self.pipe(
-                [x, -200 * scale, 40 * scale],
-                [x, -400 * scale, 35 * scale],
-                branch_pipe
-            )
-            scene.add_geometry(pipe_cf)
+        for tx in train_x:
+            train_outputs.append([tx, layout.OUTPUT_Y * scale, layout.OUTPUT_Z * scale])
 
-            train_outputs.append([x, -400 * scale, 35 * scale])
+        self._lap("train_placement")
+        self._partial_trains(buffer, trains)
 
         # ================= OUTPUT ROUTING =================
 
-        merge_y = -500 * scale
+        merge_y = layout.MERGE_Y * scale
 
         if trains == 1:
 
@@ -148,12 +709,12 @@ class SimpleCADGenerator:
                 [output[0], merge_y, output[2]],
                 branch_pipe
             )
-            scene.add_geometry(direct_drop)
+            buffer.add_geometry(direct_drop, train=0)
 
-            self.route_to_storage(scene,
+            self.route_to_storage(buffer,
                                   output[0],
                                   merge_y,
-                                  35 * scale,
+                                  layout.OUTPUT_Z * scale,
                                   storage_x,
                                   storage_radius,
                                   branch_pipe,
@@ -161,52 +722,276 @@ class SimpleCADGenerator:
 
         else:
 
-            for output in train_outputs:
-                merge_pipe = self.pipe(
-                    output,
-                    [output[0], merge_y, output[2]],
-                    branch_pipe
-                )
-                scene.add_geometry(merge_pipe)
-
-            merge_header = self.pipe(
-                [base_x, merge_y, 35 * scale],
-                [base_x + train_spacing * (trains - 1),
-                 merge_y,
-                 35 * scale],
-                branch_pipe
+            # One drop per train plus the merge header, in one batch
+            outputs = np.array(train_outputs)
+            merge_points = outputs.copy()
+            merge_points[:, 1] = merge_y
+
+            merge_pipes = self.pipe_network(
+                np.vstack([outputs, [[base_x, merge_y, layout.OUTPUT_Z * scale]]]),
+                np.vstack([merge_points, [[base_x + train_spacing * (trains - 1),
+                                           merge_y,
+                                           layout.OUTPUT_Z * scale]]]),
+                branch_pipe,
+                trains=list(range(trains)) + [None]
             )
-            scene.add_geometry(merge_header)
+            buffer.add_geometry(merge_pipes)
 
             drop_x = base_x + train_spacing * (trains - 1)
 
-            self.route_to_storage(scene,
+            self.route_to_storage(buffer,
                                   drop_x,
                                   merge_y,
-                                  35 * scale,
+                                  layout.OUTPUT_Z * scale,
                                   storage_x,
                                   storage_radius,
                                   branch_pipe,
                                   scale)
 
-        # ================= CENTER & EXPORT =================
+        self._lap("output_routing")
+
+        return buffer
 
-        scene = self.center(scene)
+    # ============================================================
+    # LARGE-PLANT MODE
+    # ============================================================
 
-        glb_path = os.path.join(self.export_dir, f"wtp_{timestamp}.glb")
-        scene.export(glb_path)
+    def _assemble_large(self, params):
+        # Trains in banks (rows along -y), each bank with its own headers.
+        # Only one train mesh lives in memory; the STL is streamed train by
+        # train, so peak memory stays flat as the train count grows.
 
-        combined = trimesh.util.concatenate(scene.dump())
-        stl_path = os.path.join(self.export_dir, f"wtp_{timestamp}.stl")
-        combined.export(stl_path)
+        buffer = GeometryBuffer()
 
-        return glb_path, stl_path
+        trains = params["trains"]
+        per_bank = params["trains_per_bank"]
+        scale = params["scale"]
+
+        banks = math.ceil(trains / per_bank)
+        row_trains = min(trains, per_bank)
+
+        rack_y = layout.RACK_Y * scale
+        rack_height = layout.RACK_HEIGHT * scale
+
+        main_pipe = layout.MAIN_PIPE * scale
+        branch_pipe = layout.BRANCH_PIPE * scale
+
+        train_spacing = layout.TRAIN_SPACING * scale
+        bank_pitch = layout.BANK_PITCH * scale
+        base_x = -((row_trains - 1) / 2) * train_spacing
+        merge_y = layout.MERGE_Y * scale
+
+        header_start = base_x - layout.HEADER_LEAD * scale
+        header_end = base_x + train_spacing * (row_trains - 1)
+        trunk_x = header_end + layout.TRUNK_OFFSET * scale
+
+        # ================= GROUND =================
+
+        ground = trimesh.creation.box(
+            extents=[train_spacing * row_trains + layout.LARGE_GROUND_MARGIN * scale,
+                     layout.GROUND_DEPTH * scale + bank_pitch * (banks - 1),
+                     20]
+        )
+        ground.visual.face_colors = [170, 170, 170, 255]
+        ground.apply_translation([layout.TRUNK_OFFSET * scale, -bank_pitch * (banks - 1) / 2, -20])
+        buffer.add_geometry(ground, "ground")
+
+        # ================= STORAGE TANK =================
+
+        storage_x = trunk_x + layout.STORAGE_OFFSET * scale
+        storage_radius = layout.STORAGE[0] * scale
+        storage_height = layout.STORAGE[1] * scale
+
+        storage = self.tank(storage_x, 0, storage_radius, storage_height)
+        buffer.add_geometry(storage)
+
+        self._lap("ground_header")
+        self._partial(buffer, "ground_header")
+
+        # ================= TRAINS (INSTANCED) =================
+
+        proxy = self._proxy()
+        if proxy == "bank":
+            # Mixer front to filter back
+            front = layout.MIXER[0] * scale
+            back = (layout.OUTPUT_Y - layout.FILTER[1] / 2) * scale
+            # One box over each bank's equipment, nothing per train
+            for b in range(banks):
+                bank_trains = min(per_bank, trains - b * per_bank)
+                width = train_spacing * (bank_trains - 1) + layout.FILTER[0] * scale
+                buffer.add_geometry(tag(self.block(
+                    base_x + width / 2 - layout.FILTER[0] / 2 * scale,
+                    -b * bank_pitch + (front + back) / 2,
+                    width, front - back, layout.MIXER[1] * scale), "proxy"))
+        else:
+            offsets = [[base_x + (i % per_bank) * train_spacing, -(i // per_bank) * bank_pitch, 0]
+                       for i in range(trains)]
+
+            if proxy == "train":
+                buffer.add_instances("train", self.train_proxy(scale), offsets)
+            else:
+                train = self.train_assembly(scale, rack_y, rack_height, branch_pipe)
+
+                outfall = GeometryBuffer()
+                outfall.add_geometry(self.pipe(
+                    [0, layout.OUTPUT_Y * scale, layout.OUTPUT_Z * scale],
+                    [0, merge_y, layout.OUTPUT_Z * scale],
+                    branch_pipe
+                ))
+
+                buffer.add_instances("train", train, offsets)
+                buffer.add_instances("train_outfall", outfall, offsets)
+        self._lap("train_assembly")
+
+        self._lap("train_placement")
+        self._partial_trains(buffer, trains)
+
+        # ================= BANK HEADERS =================
+
+        starts, ends, radii = [], [], []
+        for b in range(banks):
+            y = -b * bank_pitch
+            bank_trains = min(per_bank, trains - b * per_bank)
+            bank_end = base_x + train_spacing * (bank_trains - 1)
+
+            starts.append([header_start, rack_y + y, rack_height])
+            ends.append([max(bank_end, header_start + layout.HEADER_LEAD * scale), rack_y + y, rack_height])
+            radii.append(main_pipe)
+
+            starts.append([base_x, merge_y + y, layout.OUTPUT_Z * scale])
+            ends.append([trunk_x, merge_y + y, layout.OUTPUT_Z * scale])
+            radii.append(branch_pipe)
+
+        # ================= TRUNK & STORAGE ROUTING =================
+
+        if banks > 1:
+            starts.append([trunk_x, merge_y - bank_pitch * (banks - 1), layout.OUTPUT_Z * scale])
+            ends.append([trunk_x, merge_y, layout.OUTPUT_Z * scale])
+            radii.append(branch_pipe)
+
+        buffer.add_geometry(self.pipe_network(starts, ends, radii))
+
+        self.route_to_storage(buffer,
+                              trunk_x,
+                              merge_y,
+                              layout.OUTPUT_Z * scale,
+                              storage_x,
+                              storage_radius,
+                              branch_pipe,
+                              scale)
+
+        self._lap("output_routing")
+
+        return buffer
+
+    # ============================================================
+    # SPEC-DRIVEN MODE (core.engine JSON)
+    # ============================================================
+
+    def _assemble_spec(self, params):
+        # Compiled plan (cached by spec hash), one template batch per
+        # primitive, color and tessellation level
+        _, plan = self.plans.get(params["spec"])
+        self._lap("plan")
+
+        buffer = GeometryBuffer()
+
+        for (primitive, color), group in plan.groups.items():
+            dims = group["dims"]
+            linear = group["rotations"] * dims[:, None, :]
+            translations = group["translations"]
+
+            if primitive == "box":
+                levels = np.ones(len(dims), dtype=int)
+            else:
+                levels = np.array([self.sections(r) for r in dims[:, 0]])
+
+            matrices = np.tile(np.eye(4), (len(dims), 1, 1))
+            matrices[:, :3, :3] = linear
+            matrices[:, :3, 3] = translations
+
+            kind = "box" if primitive == "box" else "cylinder"
+            for level in np.unique(levels):
+                idx = np.flatnonzero(levels == level)
+                vertices, faces = self.primitives.instances(kind, int(level),
+                                                            linear[idx], translations[idx])
+                buffer.add_batch(vertices, faces, color, primitive, len(idx),
+                                 self.primitives.template(kind, int(level)), matrices[idx])
+
+        self._lap("spec_assembly")
+
+        return buffer
+
+    # ============================================================
+    # TREATMENT TRAIN SUB-ASSEMBLY
+    # ============================================================
+
+    def train_assembly(self, scale, rack_y, rack_height, branch_pipe):
+        # One treatment train at x=0; callers place it with translations
+
+        train = GeometryBuffer()
+        x = 0
+
+        mixer = self.tank(x, 0, layout.MIXER[0] * scale, layout.MIXER[1] * scale)
+        clarifier_y = layout.CLARIFIER_Y * scale
+        clarifier = self.tank(x, clarifier_y,
+                              layout.CLARIFIER[0] * scale,
+                              layout.CLARIFIER[1] * scale)
+        output = [x, layout.OUTPUT_Y * scale, layout.OUTPUT_Z * scale]
+        filter_block = self.block(x, output[1], *(d * scale for d in layout.FILTER))
+
+        train.add_geometry(mixer)
+        train.add_geometry(clarifier)
+        train.add_geometry(filter_block)
+
+        nozzle_z = layout.NOZZLE_Z * scale
+        inlet_z = layout.CLARIFIER_INLET_Z * scale
+        drop_y = rack_y - layout.RACK_DROP * scale
+
+        nozzle = self.professional_nozzle(x, 0, nozzle_z, branch_pipe)
+        train.add_geometry(nozzle)
+
+        elbow1 = self.elbow_90(
+            [x, drop_y, rack_height],
+            branch_pipe,
+            axis="z"
+        )
+        train.add_geometry(elbow1)
+
+        # Drop, vertical, horizontal, mixer->clarifier, clarifier->filter
+        pipes = self.pipe_network(
+            [[x, rack_y, rack_height],
+             [x, drop_y, rack_height],
+             [x, drop_y, nozzle_z],
+             [x, 0, nozzle_z],
+             [x, clarifier_y, inlet_z]],
+            [[x, drop_y, rack_height],
+             [x, drop_y, nozzle_z],
+             [x, 0, nozzle_z],
+             [x, clarifier_y, inlet_z],
+             output],
+            branch_pipe
+        )
+        train.add_geometry(pipes)
+
+        return train
+
+    def train_proxy(self, scale):
+        # Mixer, clarifier and filter as boxes: 36 triangles per train
+        proxy = GeometryBuffer()
+        for y, (radius, height) in ((0, layout.MIXER),
+                                    (layout.CLARIFIER_Y, layout.CLARIFIER)):
+            proxy.add_geometry(tag(self.block(0, y * scale, 2 * radius * scale,
+                                              2 * radius * scale, height * scale), "proxy"))
+        proxy.add_geometry(tag(self.block(0, layout.OUTPUT_Y * scale,
+                                          *(d * scale for d in layout.FILTER)), "proxy"))
+        return proxy
 
     # ============================================================
     # STORAGE ROUTING
     # ============================================================
 
-    def route_to_storage(self, scene,
+    def route_to_storage(self, buffer,
                          drop_x,
                          merge_y,
                          drop_z,
@@ -215,137 +1000,160 @@ class SimpleCADGenerator:
                          radius,
                          scale):
 
-        vertical_rise = self.pipe(
-            [drop_x, merge_y, drop_z],
-            [drop_x, merge_y, 90 * scale],
-            radius
-        )
-        scene.add_geometry(vertical_rise)
+        route_z = layout.ROUTE_Z * scale
+        inlet_z = layout.STORAGE_INLET_Z * scale
 
-        elbow_turn = self.elbow_90(
-            [drop_x, merge_y, 90 * scale],
-            radius,
-            axis="y"
-        )
-        scene.add_geometry(elbow_turn)
+        turn = [drop_x, merge_y, route_z]
+        above_storage = [storage_x - storage_radius - layout.ROUTE_CLEARANCE * scale, 0, route_z]
 
-        horizontal_run = self.pipe(
-            [drop_x, merge_y, 90 * scale],
-            [storage_x - storage_radius - 20 * scale,
-             0,
-             90 * scale],
+        # Vertical rise, horizontal run and final drop in one batch
+        pipes = self.pipe_network(
+            [[drop_x, merge_y, drop_z], turn, above_storage],
+            [turn, above_storage, [storage_x - storage_radius, 0, inlet_z]],
             radius
         )
-        scene.add_geometry(horizontal_run)
+        buffer.add_geometry(pipes)
 
-        elbow_down = self.elbow_90(
-            [storage_x - storage_radius - 20 * scale,
-             0,
-             90 * scale],
-            radius,
-            axis="z"
-        )
-        scene.add_geometry(elbow_down)
-
-        final_drop = self.pipe(
-            [storage_x - storage_radius - 20 * scale,
-             0,
-             90 * scale],
-            [storage_x - storage_radius,
-             0,
-             60 * scale],
-            radius
-        )
-        scene.add_geometry(final_drop)
+        elbow_turn = self.elbow_90(turn, radius, axis="y")
+        buffer.add_geometry(elbow_turn)
+
+        elbow_down = self.elbow_90(above_storage, radius, axis="z")
+        buffer.add_geometry(elbow_down)
 
         storage_nozzle = self.professional_nozzle(
             storage_x - storage_radius,
             0,
-            60 * scale,
+            inlet_z,
             radius
         )
-        scene.add_geometry(storage_nozzle)
+        buffer.add_geometry(storage_nozzle)
 
     # ============================================================
-    # COMPONENT HELPERS (UNCHANGED)
+    # COMPONENT HELPERS (TEMPLATE INSTANCES)
     # ============================================================
 
+    def sections(self, radius):
+        # Per-build tolerance while assembling, generator default otherwise
+        tolerance = getattr(self._local, "tolerance", None)
+        if tolerance is None:
+            tolerance = self.chord_tolerance
+        return sections_for_radius(radius, tolerance)
+
     def professional_nozzle(self, x, y, z, radius):
-        stub = trimesh.creation.cylinder(radius=radius * 1.05, height=radius * 3, sections=32)
-        flange = trimesh.creation.cylinder(radius=radius * 1.8, height=radius * 0.6, sections=32)
-        flange.apply_translation([0, 0, radius * 3])
-        neck = trimesh.creation.cylinder(radius=radius * 1.3, height=radius, sections=32)
-        neck.apply_translation([0, 0, radius * 2])
-        nozzle = trimesh.util.concatenate([stub, neck, flange])
+        transform = np.eye(4)
+        transform[:3, 3] = [x, y, z]
+        nozzle = self.primitives.instance("nozzle", self.sections(radius * 1.8),
+                                          radius, transform)
         nozzle.visual.face_colors = [130, 130, 130, 255]
-        nozzle.apply_translation([x, y, z])
-        return nozzle
+        return tag(nozzle, "nozzle")
 
     def elbow_90(self, position, radius, axis="y"):
-        elbow = trimesh.creation.torus(
-            major_radius=radius * 2.5,
-            minor_radius=radius,
-            major_sections=32,
-            minor_sections=16
-        )
-        elbow.visual.face_colors = [100, 100, 100, 255]
+        transform = np.eye(4)
 
         if axis == "y":
-            elbow.apply_transform(trimesh.transformations.rotation_matrix(np.pi / 2, [0, 1, 0]))
+            transform = trimesh.transformations.rotation_matrix(np.pi / 2, [0, 1, 0])
         if axis == "z":
-            elbow.apply_transform(trimesh.transformations.rotation_matrix(np.pi / 2, [0, 0, 1]))
+            transform = trimesh.transformations.rotation_matrix(np.pi / 2, [0, 0, 1])
 
-        elbow.apply_translation(position)
-        return elbow
+        transform[:3, 3] = position
+        level = (self.sections(radius * 2.5), self.sections(radius))
+        elbow = self.primitives.instance("torus", level, radius, transform)
+        elbow.visual.face_colors = [100, 100, 100, 255]
+        return tag(elbow, "elbow")
 
     def tank(self, x, y, radius, height):
-        body = trimesh.creation.cylinder(radius=radius, height=height, sections=64)
-        body.apply_translation([0, 0, height / 2])
+        body_transform = np.eye(4)
+        body_transform[:3, 3] = [x, y, height / 2]
+        sections = self.sections(radius)
+        body = self.primitives.instance("cylinder", sections,
+                                        [radius, radius, height],
+                                        body_transform)
 
-        dome = trimesh.creation.icosphere(subdivisions=2, radius=radius)
-        dome.vertices[:, 2] = np.maximum(dome.vertices[:, 2], 0)
-        dome.apply_translation([0, 0, height])
+        dome_transform = np.eye(4)
+        dome_transform[:3, 3] = [x, y, height]
+        dome = self.primitives.instance("hemisphere", sections, radius, dome_transform)
 
         tank = trimesh.util.concatenate([body, dome])
         tank.visual.face_colors = [210, 210, 210, 255]
-        tank.apply_translation([x, y, 0])
+        tank.metadata["components"] = [
+            ("tank_body", len(body.vertices), len(body.faces)),
+            ("tank_dome", len(dome.vertices), len(dome.faces))
+        ]
+        tank.metadata["templates"] = body.metadata["templates"] + dome.metadata["templates"]
         return tank
 
     def block(self, x, y, w, d, h):
-        b = trimesh.creation.box(extents=[w, d, h])
+        transform = np.eye(4)
+        transform[:3, 3] = [x, y, h / 2]
+        b = self.primitives.instance("box", 1, [w, d, h], transform)
         b.visual.face_colors = [200, 200, 200, 255]
-        b.apply_translation([x, y, h / 2])
-        return b
+        return tag(b, "block")
 
     def pipe(self, start, end, radius):
-        start = np.array(start)
-        end = np.array(end)
-        direction = end - start
-        length = np.linalg.norm(direction)
-
-        if length < 1e-6:
+        return self.pipe_network([start], [end], radius)
+
+    def pipe_network(self, starts, ends, radii, trains=None):
+        # All segments in one NumPy pass: one mesh, one template lookup per
+        # tessellation level; zero-length segments are dropped up front.
+        starts = np.asarray(starts, dtype=np.float64).reshape(-1, 3)
+        ends = np.asarray(ends, dtype=np.float64).reshape(-1, 3)
+        radii = np.broadcast_to(np.asarray(radii, dtype=np.float64), (len(starts),))
+        trains = list(trains) if trains is not None else [None] * len(starts)
+
+        directions = ends - starts
+        lengths = np.linalg.norm(directions, axis=1)
+        keep = np.flatnonzero(lengths >= 1e-6)
+        if len(keep) == 0:
             return None
 
-        cyl = trimesh.creation.cylinder(radius=radius, height=length, sections=32)
-        cyl.apply_translation([0, 0, length / 2])
-
-        rot = trimesh.geometry.align_vectors([0, 0, 1], direction / length)
-        cyl.apply_transform(rot)
-        cyl.apply_translation(start)
-        cyl.visual.face_colors = [100, 100, 100, 255]
-        return cyl
-
-    def center(self, scene):
-        combined = trimesh.util.concatenate(scene.dump())
-        centroid = combined.centroid
-        transform = np.eye(4)
-        transform[:3, 3] = -centroid
-        scene.apply_transform(transform)
-        return scene
+        starts, directions = starts[keep], directions[keep]
+        radii, lengths = radii[keep], lengths[keep]
+        trains = [trains[i] for i in keep]
+
+        # Unit cylinder spans z in [-0.5, 0.5]: scale to (r, r, L), rotate
+        # onto the segment and center it on the segment midpoint
+        rotations = align_z(directions / lengths[:, None])
+        linear = rotations * np.column_stack([radii, radii, lengths])[:, None, :]
+        midpoints = starts + directions / 2
+
+        unique_radii, radius_index = np.unique(radii, return_inverse=True)
+        levels = np.array([self.sections(r) for r in unique_radii])[radius_index]
+
+        matrices = np.tile(np.eye(4), (len(linear), 1, 1))
+        matrices[:, :3, :3] = linear
+        matrices[:, :3, 3] = midpoints
+
+        vertices, faces, components, templates = [], [], [], []
+        offset = 0
+        for level in np.unique(levels):
+            idx = np.flatnonzero(levels == level)
+            v, f = self.primitives.instances("cylinder", int(level), linear[idx], midpoints[idx])
+            vertices.append(v)
+            faces.append(f + offset)
+            offset += len(v)
+
+            per_vertices, per_faces = len(v) // len(idx), len(f) // len(idx)
+            components.extend(("pipe", per_vertices, per_faces, trains[i]) for i in idx)
+
+            template = self.primitives.template("cylinder", int(level))
+            templates.extend((template, matrices[i]) for i in idx)
+
+        network = trimesh.Trimesh(vertices=np.concatenate(vertices),
+                                  faces=np.concatenate(faces),
+                                  process=False)
+        network.visual.face_colors = [100, 100, 100, 255]
+        network.metadata["components"] = components
+        network.metadata["templates"] = templates
+        return network
+
+    def center(self, buffer):
+        buffer.translate(-buffer.centroid)
+        return buffer
 
     def extract_mld(self, prompt):
-        match = re.search(r'(\d+)\s*MLD', prompt, re.IGNORECASE)
-        return int(match.group(1)) if match else 100
+        # Generator default is a 100 MLD plant (the engine defaults to 10)
+        mld = parse_prompt(prompt).capacity
+        return mld if mld is not None else 100
 
     def train_count(self, mld):
         if mld <= 50:
@@ -358,5 +1166,90 @@ class SimpleCADGenerator:
             return 4
 
 
-_generator = SimpleCADGenerator()
-build_3d_model = _generator.build_3d_model
+def _positive_number(value, name):
+    # Finite and > 0; numeric strings are accepted, bools are not
+    try:
+        number = float(value) if not isinstance(value, bool) else math.nan
+    except (TypeError, ValueError):
+        number = math.nan
+    if not math.isfinite(number) or number <= 0:
+        raise ValueError(f"{name} must be a positive number, got {value!r}")
+    return number
+
+
+def _positive_int(value, name):
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValueError(f"{name} must be a positive integer, got {value!r}")
+    return value
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _size(output):
+    # Output path, or in-memory bytes from generate_bytes()
+    return len(output) if isinstance(output, (bytes, bytearray, memoryview)) else os.path.getsize(output)
+
+
+# ============================================================
+# SHARED INSTANCE
+# ============================================================
+
+# Created on first use, not at import: the constructor touches the
+# export directory and the result cache
+_generator = None
+_generator_options = None
+_generator_lock = threading.Lock()
+
+
+def get_generator(**options):
+    """The process-wide SimpleCADGenerator.
+
+    The first call creates it with options; later calls may repeat those
+    options or pass none, and raise ValueError for any other options
+    rather than silently ignoring them.
+    """
+    global _generator, _generator_options
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                _generator = SimpleCADGenerator(**options)
+                _generator_options = options
+                return _generator
+
+    if options and options != _generator_options:
+        raise ValueError(f"The shared generator was created with {_generator_options!r}; "
+                         f"cannot apply {options!r}")
+    return _generator
+
+
+def build_3d_model(json_params, user_prompt=""):
+    return get_generator().build_3d_model(json_params, user_prompt)
+
+
+def generate(json_params, user_prompt=""):
+    return get_generator().generate(json_params, user_prompt)
+
+
+def generate_lods(json_params, user_prompt=""):
+    return get_generator().generate_lods(json_params, user_prompt)
+
+
+def generate_stream(json_params, user_prompt=""):
+    return get_generator().generate_stream(json_params, user_prompt)
+
+
+def generate_bytes(json_params, user_prompt=""):
+    return get_generator().generate_bytes(json_params, user_prompt)
+
+
+def budget_report(json_params, user_prompt=""):
+    return get_generator().budget_report(json_params, user_prompt)
+
+
+def clash_report(json_params, user_prompt=""):
+    return get_generator().clash_report(json_params, user_prompt)
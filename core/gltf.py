@@ -0,0 +1,401 @@
+import json
+import math
+import struct
+
+import numpy as np
+import trimesh
+
+
+def read_glb_json(path):
+    """JSON chunk of a binary glTF file, without reading the binary chunk"""
+    with open(path, "rb") as f:
+        magic, _, _ = struct.unpack("<4sII", f.read(12))
+        if magic != b"glTF":
+            raise ValueError(f"Not a GLB file: {path}")
+        length, chunk_type = struct.unpack("<I4s", f.read(8))
+        if chunk_type != b"JSON":
+            raise ValueError(f"GLB without a leading JSON chunk: {path}")
+        return json.loads(f.read(length))
+
+
+def glb_triangle_count(path):
+    """Rendered triangle count of a GLB, counting every mesh node instance"""
+    tree = read_glb_json(path)
+    accessors = tree.get("accessors", [])
+
+    mesh_triangles = []
+    for mesh in tree.get("meshes", []):
+        count = 0
+        for primitive in mesh.get("primitives", []):
+            if primitive.get("mode", 4) != 4:
+                continue
+            if "indices" in primitive:
+                count += accessors[primitive["indices"]]["count"] // 3
+            else:
+                count += accessors[primitive["attributes"]["POSITION"]]["count"] // 3
+        mesh_triangles.append(count)
+
+    return sum(mesh_triangles[node["mesh"]]
+               for node in tree.get("nodes", []) if "mesh" in node)
+
+
+# Normalized accessors map integers onto [-1, 1] / [0, 1]
+NORMALIZED_SCALE = {5120: 127, 5121: 255, 5122: 32767, 5123: 65535}
+
+
+def glb_bounds(tree):
+    """World-space (lower, upper) of a GLB's scene from accessor min/max.
+
+    Reads only the JSON chunk (see read_glb_json): every POSITION box is
+    carried through its node's world transform. Conservative for rotated
+    nodes; None when the file has no bounded geometry.
+    """
+    nodes = tree.get("nodes", [])
+    meshes = tree.get("meshes", [])
+    accessors = tree.get("accessors", [])
+    scenes = tree.get("scenes") or [{"nodes": list(range(len(nodes)))}]
+    roots = scenes[tree.get("scene", 0)].get("nodes", [])
+
+    corners = []
+    stack = [(index, np.eye(4)) for index in roots]
+    while stack:
+        index, parent = stack.pop()
+        node = nodes[index]
+        world = parent @ _node_matrix(node)
+        stack.extend((child, world) for child in node.get("children", []))
+
+        if "mesh" not in node:
+            continue
+        for primitive in meshes[node["mesh"]].get("primitives", []):
+            accessor = accessors[primitive["attributes"]["POSITION"]]
+            if "min" not in accessor or "max" not in accessor:
+                continue
+            box = np.array([accessor["min"], accessor["max"]], dtype=np.float64)
+            if accessor.get("normalized"):
+                box /= NORMALIZED_SCALE.get(accessor["componentType"], 1)
+            points = np.array(np.meshgrid(*box.T)).reshape(3, -1).T
+            corners.append(points @ world[:3, :3].T + world[:3, 3])
+
+    if not corners:
+        return None
+    corners = np.vstack(corners)
+    return corners.min(axis=0), corners.max(axis=0)
+
+
+def _node_matrix(node):
+    if "matrix" in node:
+        return np.array(node["matrix"], dtype=np.float64).reshape(4, 4).T
+
+    x, y, z, w = node.get("rotation", (0, 0, 0, 1))
+    rotation = np.array([
+        [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+        [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)]
+    ])
+    matrix = np.eye(4)
+    matrix[:3, :3] = rotation * np.asarray(node.get("scale", (1, 1, 1)), dtype=np.float64)
+    matrix[:3, 3] = node.get("translation", (0, 0, 0))
+    return matrix
+
+
+# ============================================================
+# WRITER
+# ============================================================
+
+FLOAT, SHORT, BYTE = 5126, 5122, 5120
+UNSIGNED_SHORT, UNSIGNED_INT = 5123, 5125
+ARRAY_BUFFER, ELEMENT_ARRAY_BUFFER = 34962, 34963
+
+
+def _g(value):
+    # Seven significant digits: float32 precision, compact JSON
+    return float(f"{value:.7g}")
+
+
+class GLBWriter:
+    """Binary glTF with shared meshes, per-color materials and optional
+    KHR_mesh_quantization.
+
+    Each distinct template (or baked mesh) is stored once and drawn by one
+    node per placement. Quantized positions are non-normalized int16 with
+    the dequantization folded into the node transform; quantized normals
+    are normalized int8.
+    """
+
+    def __init__(self, quantize=False, normals=False):
+        self.quantize = quantize
+        self.normals = normals
+        self.tree = {
+            "asset": {"version": "2.0", "generator": "AI WTP Architect"},
+            "scene": 0,
+            "scenes": [{"nodes": []}],
+            "nodes": [], "meshes": [], "materials": [],
+            "accessors": [], "bufferViews": [], "buffers": []
+        }
+        self._binary = bytearray()
+        self._materials = {}
+        self._geometry = {}
+
+    # ============================================================
+    # BINARY LAYOUT
+    # ============================================================
+
+    def _view(self, array, target, stride=None):
+        while len(self._binary) % 4:
+            self._binary.append(0)
+        data = np.ascontiguousarray(array).tobytes()
+        view = {"buffer": 0, "byteOffset": len(self._binary),
+                "byteLength": len(data), "target": target}
+        if stride:
+            view["byteStride"] = stride
+        self._binary.extend(data)
+        self.tree["bufferViews"].append(view)
+        return len(self.tree["bufferViews"]) - 1
+
+    def _accessor(self, view, component, count, kind, normalized=False, bounds=None):
+        accessor = {"bufferView": view, "componentType": component,
+                    "count": int(count), "type": kind}
+        if normalized:
+            accessor["normalized"] = True
+        if bounds is not None:
+            accessor["min"] = [_g(v) for v in bounds[0]]
+            accessor["max"] = [_g(v) for v in bounds[1]]
+        self.tree["accessors"].append(accessor)
+        return len(self.tree["accessors"]) - 1
+
+    def material(self, color):
+        color = tuple(int(c) for c in color)
+        if color not in self._materials:
+            material = {
+                "pbrMetallicRoughness": {
+                    "baseColorFactor": [c / 255 for c in color],
+                    "metallicFactor": 0.0,
+                    "roughnessFactor": 0.8
+                },
+                "doubleSided": True
+            }
+            if color[3] < 255:
+                material["alphaMode"] = "BLEND"
+            self.tree["materials"].append(material)
+            self._materials[color] = len(self.tree["materials"]) - 1
+        return self._materials[color]
+
+    # ============================================================
+    # GEOMETRY
+    # ============================================================
+
+    def geometry(self, vertices, faces, normals=None, key=None):
+        """Attributes and (center, scale) dequantization for one vertex set"""
+        if key is not None and key in self._geometry:
+            return self._geometry[key]
+
+        vertices = np.asarray(vertices, dtype=np.float64)
+        attributes = {}
+
+        if self.quantize:
+            lower, upper = vertices.min(axis=0), vertices.max(axis=0)
+            center = (lower + upper) / 2
+            half = np.where(upper > lower, (upper - lower) / 2, 1.0)
+            step = half / 32767
+
+            # int16 x3 padded to 8 bytes: vertex strides must be 4-aligned
+            packed = np.zeros((len(vertices), 4), dtype=np.int16)
+            packed[:, :3] = np.round((vertices - center) / step)
+            view = self._view(packed, ARRAY_BUFFER, stride=8)
+            attributes["POSITION"] = self._accessor(
+                view, SHORT, len(vertices), "VEC3",
+                bounds=(packed[:, :3].min(axis=0), packed[:, :3].max(axis=0)))
+        else:
+            center, step = np.zeros(3), np.ones(3)
+            positions = vertices.astype(np.float32)
+            attributes["POSITION"] = self._accessor(
+                self._view(positions, ARRAY_BUFFER), FLOAT, len(vertices), "VEC3",
+                bounds=(positions.min(axis=0), positions.max(axis=0)))
+
+        if self.normals and normals is not None:
+            # Normals live in the quantized frame: scale by the step, renormalize
+            normals = np.asarray(normals, dtype=np.float64) * step
+            lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+            normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+            if self.quantize:
+                packed = np.zeros((len(normals), 4), dtype=np.int8)
+                packed[:, :3] = np.round(normals * 127)
+                view = self._view(packed, ARRAY_BUFFER, stride=4)
+                attributes["NORMAL"] = self._accessor(view, BYTE, len(normals), "VEC3",
+                                                      normalized=True)
+            else:
+                attributes["NORMAL"] = self._accessor(
+                    self._view(normals.astype(np.float32), ARRAY_BUFFER),
+                    FLOAT, len(normals), "VEC3")
+
+        geometry = (attributes, len(vertices), center, step)
+        if key is not None:
+            self._geometry[key] = geometry
+        return geometry
+
+    def mesh(self, geometry, faces, face_colors, name):
+        """One mesh, one primitive per distinct face color"""
+        attributes, count, _, _ = geometry
+        faces = np.asarray(faces)
+        colors, inverse = np.unique(np.asarray(face_colors), axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+
+        dtype, component = ((np.uint16, UNSIGNED_SHORT) if count <= 65535
+                            else (np.uint32, UNSIGNED_INT))
+        primitives = []
+        for i, color in enumerate(colors):
+            indices = faces[inverse == i].astype(dtype).ravel()
+            view = self._view(indices, ELEMENT_ARRAY_BUFFER)
+            primitives.append({
+                "attributes": dict(attributes),
+                "indices": self._accessor(view, component, len(indices), "SCALAR"),
+                "material": self.material(color),
+                "mode": 4
+            })
+
+        self.tree["meshes"].append({"name": name, "primitives": primitives})
+        return len(self.tree["meshes"]) - 1
+
+    def node(self, mesh, geometry, matrix, name):
+        """Node drawing mesh at a 4x4 placement, dequantization folded in"""
+        _, _, center, step = geometry
+        matrix = np.asarray(matrix, dtype=np.float64)
+
+        # placement @ translate(center) @ scale(step), written as TRS
+        linear = matrix[:3, :3] * step
+        translation = matrix[:3, :3] @ center + matrix[:3, 3]
+        scale = np.linalg.norm(linear, axis=0)
+        rotation = linear / np.where(scale > 0, scale, 1.0)
+        if np.linalg.det(rotation) < 0:
+            scale[0], rotation[:, 0] = -scale[0], -rotation[:, 0]
+
+        node = {"name": name, "mesh": mesh}
+        if np.any(translation != 0):
+            node["translation"] = [_g(v) for v in translation]
+        quaternion = _quaternion(rotation)
+        if not np.allclose(quaternion, [0, 0, 0, 1]):
+            node["rotation"] = [_g(v) for v in quaternion]
+        if not np.allclose(scale, 1):
+            node["scale"] = [_g(v) for v in scale]
+
+        self.tree["nodes"].append(node)
+        self.tree["scenes"][0]["nodes"].append(len(self.tree["nodes"]) - 1)
+
+    # ============================================================
+    # OUTPUT
+    # ============================================================
+
+    def tobytes(self):
+        if self.quantize:
+            self.tree["extensionsUsed"] = ["KHR_mesh_quantization"]
+            self.tree["extensionsRequired"] = ["KHR_mesh_quantization"]
+        while len(self._binary) % 4:
+            self._binary.append(0)
+        self.tree["buffers"] = [{"byteLength": len(self._binary)}]
+
+        text = json.dumps(self.tree, separators=(",", ":")).encode()
+        text += b" " * (-len(text) % 4)
+
+        length = 12 + 8 + len(text) + 8 + len(self._binary)
+        return b"".join([
+            struct.pack("<4sII", b"glTF", 2, length),
+            struct.pack("<I4s", len(text), b"JSON"), text,
+            struct.pack("<I4s", len(self._binary), b"BIN\x00"), bytes(self._binary)
+        ])
+
+
+def _quaternion(rotation):
+    # (x, y, z, w) of a proper rotation matrix
+    m = rotation
+    trace = m[0, 0] + m[1, 1] + m[2, 2]
+    if trace > 0:
+        s = 2 * math.sqrt(trace + 1)
+        q = [(m[2, 1] - m[1, 2]) / s, (m[0, 2] - m[2, 0]) / s, (m[1, 0] - m[0, 1]) / s, s / 4]
+    elif m[0, 0] > m[1, 1] and m[0, 0] > m[2, 2]:
+        s = 2 * math.sqrt(1 + m[0, 0] - m[1, 1] - m[2, 2])
+        q = [s / 4, (m[0, 1] + m[1, 0]) / s, (m[0, 2] + m[2, 0]) / s, (m[2, 1] - m[1, 2]) / s]
+    elif m[1, 1] > m[2, 2]:
+        s = 2 * math.sqrt(1 + m[1, 1] - m[0, 0] - m[2, 2])
+        q = [(m[0, 1] + m[1, 0]) / s, s / 4, (m[1, 2] + m[2, 1]) / s, (m[0, 2] - m[2, 0]) / s]
+    else:
+        s = 2 * math.sqrt(1 + m[2, 2] - m[0, 0] - m[1, 1])
+        q = [(m[0, 2] + m[2, 0]) / s, (m[1, 2] + m[2, 1]) / s, s / 4, (m[1, 0] - m[0, 1]) / s]
+    q = np.array(q)
+    return q / np.linalg.norm(q)
+
+
+def write_glb(buffer, path, quantize=False, normals=False):
+    with open(path, "wb") as f:
+        f.write(glb_bytes(buffer, quantize, normals))
+    return path
+
+
+def glb_bytes(buffer, quantize=False, normals=False):
+    """A GeometryBuffer as GLB bytes.
+
+    Plant-level parts placed from a PrimitiveCache template become nodes on
+    one shared mesh per template and color; everything else is baked into
+    a "plant" mesh. Instanced sub-assemblies keep one baked mesh each,
+    referenced by one node per placement.
+    """
+    writer = GLBWriter(quantize, normals)
+
+    vertices = buffer.vertices[:buffer.vertex_count]
+    faces = buffer.faces[:buffer.face_count]
+    colors = buffer.face_colors[:buffer.face_count]
+
+    baked = np.ones(len(faces), dtype=bool)
+    shared = {}
+    v0 = f0 = 0
+    for (kind, _, n_vertices, n_faces), placed in zip(buffer.parts, buffer.templates):
+        if placed is not None:
+            template, matrix = placed
+            color = tuple(colors[f0])
+            key = (id(template), color)
+            if key not in shared:
+                geometry = writer.geometry(template.vertices, template.faces,
+                                           template.vertex_normals, key=id(template))
+                name = f"{kind}_{len(template.faces)}"
+                shared[key] = (writer.mesh(geometry, template.faces,
+                                           np.tile(color, (len(template.faces), 1)), name),
+                               geometry, name)
+            mesh, geometry, name = shared[key]
+
+            placement = np.array(matrix, dtype=np.float64)
+            placement[:3, 3] += buffer.shift
+            writer.node(mesh, geometry, placement, f"{name}_{len(writer.tree['nodes'])}")
+            baked[f0:f0 + n_faces] = False
+        v0 += n_vertices
+        f0 += n_faces
+
+    if baked.any():
+        _write_baked(writer, vertices, faces[baked], colors[baked], "plant", [np.zeros(3)])
+
+    for name, sub, offsets in buffer.instances:
+        # Nested sub-assemblies are expanded into their parent's mesh
+        chunks = list(sub.tiled())
+        sub_vertices = np.concatenate([c[0] for c in chunks])
+        starts = np.cumsum([0] + [len(c[0]) for c in chunks[:-1]])
+        sub_faces = np.concatenate([c[1] + s for c, s in zip(chunks, starts)])
+        sub_colors = np.concatenate([c[2] for c in chunks])
+        _write_baked(writer, sub_vertices, sub_faces, sub_colors, name, offsets)
+
+    return writer.tobytes()
+
+
+def _write_baked(writer, vertices, faces, colors, name, offsets):
+    # Drop vertices no kept face uses, then one mesh placed at each offset
+    used, faces = np.unique(faces, return_inverse=True)
+    faces = faces.reshape(-1, 3)
+    vertices = np.asarray(vertices, dtype=np.float64)[used]
+
+    normals = None
+    if writer.normals:
+        normals = trimesh.Trimesh(vertices=vertices, faces=faces, process=False).vertex_normals
+
+    geometry = writer.geometry(vertices, faces, normals)
+    mesh = writer.mesh(geometry, faces, colors, name)
+    for i, offset in enumerate(offsets):
+        placement = np.eye(4)
+        placement[:3, 3] = offset
+        writer.node(mesh, geometry, placement, f"{name}_{i}" if len(offsets) > 1 else name)
@@ -0,0 +1,41 @@
+# Plant layout dimensions, per unit of scale. SimpleCADGenerator lays the
+# plant out from these and core.sweep derives its closed-form quantities
+# from the same values, so the two cannot drift apart.
+
+# Train rows
+TRAIN_SPACING = 400
+BANK_PITCH = 1300
+
+# Pipe radii
+MAIN_PIPE = 5
+BRANCH_PIPE = 3
+
+# Raw-water rack: header along x, one drop per train
+RACK_Y = 250
+RACK_HEIGHT = 90
+RACK_DROP = 100
+HEADER_LEAD = 200
+
+# Treatment train at x = 0: (radius, height) tanks, (w, d, h) filter
+MIXER = (25, 60)
+NOZZLE_Z = 45
+CLARIFIER = (40, 50)
+CLARIFIER_Y = -200
+CLARIFIER_INLET_Z = 40
+FILTER = (100, 80, 40)
+OUTPUT_Y = -400
+OUTPUT_Z = 35
+
+# Treated-water merge header, bank trunk and route to the storage tank
+MERGE_Y = -500
+TRUNK_OFFSET = 150
+STORAGE = (50, 80)
+STORAGE_OFFSET = 350
+STORAGE_INLET_Z = 60
+ROUTE_Z = 90
+ROUTE_CLEARANCE = 20
+
+# Ground slab: margin around the trains along x, depth along y
+GROUND_MARGIN = 800
+LARGE_GROUND_MARGIN = 1100
+GROUND_DEPTH = 1500
@@ -0,0 +1,155 @@
+import os
+import struct
+import numpy as np
+from multiprocessing.shared_memory import SharedMemory
+
+from .stl import STL_DTYPE, STL_HEADER, fill_records
+
+
+# Below this many triangles the serial StreamingSTLWriter is faster than
+# shipping tiles to worker processes
+PARALLEL_MIN_FACES = 200000
+
+# Tasks per worker, so uneven tiles still balance
+TASKS_PER_WORKER = 2
+
+
+# ============================================================
+# TILE LAYOUT
+# ============================================================
+
+def tile_layout(buffer):
+    """Every chunk GeometryBuffer.tiled() yields, without expanding it.
+
+    Returns (chunks, tiles): chunks are distinct (vertices, faces) arrays,
+    tiles are (chunk index, float32 offset or None, first record) in the
+    exact order tiled() yields them, so records land where the serial
+    writer would put them.
+    """
+    chunks, tiles = [], []
+    start = 0
+
+    def add(vertices, faces, offsets):
+        nonlocal start
+        chunks.append((vertices, faces))
+        for offset in offsets:
+            tiles.append((len(chunks) - 1, offset, start))
+            start += len(faces)
+
+    if buffer.face_count:
+        add(buffer.vertices[:buffer.vertex_count], buffer.faces[:buffer.face_count], [None])
+
+    # Same float32 offsets tiled() adds; nested sub-assemblies arrive
+    # already expanded from sub.tiled()
+    for _, sub, offsets in buffer.instances:
+        for vertices, faces, _ in sub.tiled():
+            add(vertices, faces, [offset.astype(np.float32) for offset in offsets])
+
+    return chunks, tiles
+
+
+# ============================================================
+# WORKER
+# ============================================================
+
+def _fill_tile(records, vertices, faces, offset):
+    if offset is not None:
+        vertices = vertices + offset
+    fill_records(records, vertices, faces)
+
+
+def _fill_shared(name, count, chunks, tiles):
+    # Runs in a worker: fill this task's records in the shared block.
+    # Attaching registers the block with the resource tracker; workers from
+    # core.workers.process_context() share the parent's tracker, so the
+    # parent's unlink() clears it and nothing is reported as leaked
+    block = SharedMemory(name=name)
+    try:
+        records = np.ndarray((count,), dtype=STL_DTYPE, buffer=block.buf, offset=84)
+        for chunk, offset, start in tiles:
+            vertices, faces = chunks[chunk]
+            _fill_tile(records[start:start + len(faces)], vertices, faces, offset)
+        del records
+    finally:
+        block.close()
+    return len(tiles)
+
+
+def _fill_file(path, chunks, tiles):
+    # Runs in a worker: one map over this task's contiguous record range
+    # of the output file. Dirty pages are file-backed and written back by
+    # the kernel, so no msync is needed before the parent reads the file
+    first = tiles[0][2]
+    last = tiles[-1][2] + len(chunks[tiles[-1][0]][1])
+    records = np.memmap(path, dtype=STL_DTYPE, mode="r+",
+                        offset=84 + first * STL_DTYPE.itemsize, shape=(last - first,))
+    try:
+        for chunk, offset, start in tiles:
+            vertices, faces = chunks[chunk]
+            _fill_tile(records[start - first:start - first + len(faces)],
+                       vertices, faces, offset)
+    finally:
+        del records
+    return len(tiles)
+
+
+# ============================================================
+# PARALLEL STL
+# ============================================================
+
+def write_stl(buffer, target, executor, workers):
+    """Binary STL of a GeometryBuffer, tiles filled by worker processes.
+
+    Workers write each tile's records at its offset in the output: for a
+    path, straight into a memory map of the presized file (nothing is
+    staged, so memory stays bounded); for a binary file, into one
+    shared-memory block that is then written out. Only the (small)
+    sub-assembly chunks are pickled. Output is byte-identical to
+    StreamingSTLWriter.write_buffer. Returns the triangle count.
+    """
+    chunks, tiles = tile_layout(buffer)
+    count = sum(len(chunks[chunk][1]) for chunk, _, _ in tiles)
+    size = 84 + count * STL_DTYPE.itemsize
+    header = STL_HEADER[:80].ljust(80, b" ") + struct.pack("<I", count)
+
+    if isinstance(target, (str, os.PathLike)):
+        with open(target, "wb") as f:
+            f.write(header)
+            f.truncate(size)
+        _run_tasks(executor, workers, chunks, tiles,
+                   lambda task_chunks, task_tiles: (_fill_file, os.fspath(target),
+                                                    task_chunks, task_tiles))
+        return count
+
+    block = SharedMemory(create=True, size=size)
+    try:
+        block.buf[:84] = header
+        _run_tasks(executor, workers, chunks, tiles,
+                   lambda task_chunks, task_tiles: (_fill_shared, block.name, count,
+                                                    task_chunks, task_tiles))
+        target.write(block.buf[:size])
+    finally:
+        block.close()
+        block.unlink()
+
+    return count
+
+
+def _run_tasks(executor, workers, chunks, tiles, task):
+    # Contiguous tile ranges of roughly equal triangle counts; task(chunks,
+    # tiles) gives the (fn, *args) to submit for one range
+    faces = np.array([len(chunks[chunk][1]) for chunk, _, _ in tiles])
+    bounds = np.searchsorted(np.cumsum(faces),
+                             np.linspace(0, faces.sum(), workers * TASKS_PER_WORKER + 1)[1:-1])
+    groups = [group for group in np.split(np.arange(len(tiles)), bounds) if len(group)]
+
+    futures = []
+    for group in groups:
+        task_tiles = [tiles[i] for i in group]
+        used = sorted({chunk for chunk, _, _ in task_tiles})
+        remap = {chunk: i for i, chunk in enumerate(used)}
+        futures.append(executor.submit(*task(
+            [chunks[chunk] for chunk in used],
+            [(remap[chunk], offset, start) for chunk, offset, start in task_tiles])))
+    for future in futures:
+        future.result()
@@ -0,0 +1,302 @@
+import json
+import math
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .primitives import align_z
+
+
+# Only these engine keys shape the geometry; type, description, the
+# generated timestamp and the echoed prompt never reach the cache key
+SPEC_KEYS = ("units", "connections", "components", "piping")
+
+DEFAULT_COLORS = {
+    "cylinder": (210, 210, 210, 255),
+    "box": (200, 200, 200, 255),
+    "pipe": (100, 100, 100, 255)
+}
+
+# Primitives one spec may place, patterns expanded
+MAX_INSTANCES = 20000
+
+X_AXIS = align_z([[1.0, 0.0, 0.0]])[0]
+
+
+def load_params(json_params):
+    """json_params as a dict; core.engine output may arrive as its JSON string"""
+    if isinstance(json_params, str):
+        json_params = json.loads(json_params) if json_params.strip() else {}
+    if json_params and not isinstance(json_params, dict):
+        raise ValueError("json_params must be a JSON object")
+    return json_params or {}
+
+
+def is_spec(json_params):
+    """True for core.engine output: a dict with units or components"""
+    return isinstance(json_params, dict) and ("units" in json_params or "components" in json_params)
+
+
+def normalize_spec(spec):
+    spec = load_params(spec)
+    return {key: spec[key] for key in SPEC_KEYS if key in spec}
+
+
+def spec_hash(spec):
+    payload = json.dumps(normalize_spec(spec), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# ============================================================
+# BUILD PLAN
+# ============================================================
+
+class BuildPlan:
+    """Flat list of (primitive, dims, rotation, translation, color, repeat) entries.
+
+    dims scale the unit template (cylinder: r, r, h; box: w, d, h; pipe:
+    r, r, length), rotation/translation place it. repeat is None or
+    (count, pitch): the entry is placed count times, pitch apart. Patterns
+    stay compact in the plan and are only expanded when the groups (one
+    batch per primitive and color) are first built.
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.instance_count = sum(_count(e) for e in entries)
+        self._groups = None
+
+        lower, upper = self._bounds()
+        self.bounds = (lower, upper)
+        self.extent = float(np.max(upper - lower))
+
+    @property
+    def groups(self):
+        if self._groups is None:
+            self._groups = self._expand()
+        return self._groups
+
+    def _expand(self):
+        grouped = OrderedDict()
+        for entry in self.entries:
+            grouped.setdefault((entry[0], entry[4]), []).append(entry)
+
+        groups = {}
+        for key, entries in grouped.items():
+            counts = [_count(e) for e in entries]
+            groups[key] = {
+                "dims": np.repeat([e[1] for e in entries], counts, axis=0).astype(np.float64),
+                "rotations": np.repeat([e[2] for e in entries], counts, axis=0).astype(np.float64),
+                "translations": np.concatenate([_translations(e) for e in entries])
+            }
+        return groups
+
+    def _bounds(self):
+        # Conservative: bounding sphere of each placed template; a linear
+        # pattern is bounded by its first and last placement
+        centers = np.concatenate([_translations(e)[[0, -1]] for e in self.entries])
+        half = np.repeat([e[1] for e in self.entries], 2, axis=0) / 2
+        half[np.repeat([e[0] != "box" for e in self.entries], 2), :2] *= 2
+        reach = np.linalg.norm(half, axis=1)[:, None]
+        return (centers - reach).min(axis=0), (centers + reach).max(axis=0)
+
+    def __len__(self):
+        return self.instance_count
+
+
+def _count(entry):
+    return entry[5][0] if entry[5] else 1
+
+
+def _translations(entry):
+    origin = np.asarray(entry[3], dtype=np.float64)
+    if not entry[5]:
+        return origin[None, :]
+    count, pitch = entry[5]
+    return origin + np.arange(count)[:, None] * np.asarray(pitch, dtype=np.float64)
+
+
+def compile_spec(spec):
+    """Validate an engine spec and flatten it into a BuildPlan"""
+    spec = normalize_spec(spec)
+    entries = []
+
+    units = _items(spec, "units")
+    for i, unit in enumerate(units):
+        # Connections address units by index, so units cannot repeat
+        if "repeat" in unit:
+            raise ValueError(f"units[{i}] cannot repeat; use components for patterns")
+        entries.append(_solid(unit, f"units[{i}]", on_axis=True))
+
+    for i, connection in enumerate(_items(spec, "connections")):
+        entry = _connection(connection, units, f"connections[{i}]")
+        if entry:
+            entries.append(entry)
+
+    for section in ("components", "piping"):
+        for i, component in enumerate(_items(spec, section)):
+            where = f"{section}[{i}]"
+            if component.get("shape") == "pipe":
+                entry = _straight_pipe(component, where)
+            else:
+                entry = _solid(component, where, on_axis=False)
+            entries.append(entry[:5] + (_repeat(component, where),))
+
+    if not entries:
+        raise ValueError("Spec has no units or components to build")
+
+    total = sum(_count(e) for e in entries)
+    if total > MAX_INSTANCES:
+        raise ValueError(f"Spec places {total} primitives; the limit is {MAX_INSTANCES}")
+
+    return BuildPlan(entries)
+
+
+def _repeat(item, where):
+    # {"count": n, "pitch": [dx, dy, dz]}: n copies, each pitch from the last
+    repeat = item.get("repeat")
+    if repeat is None:
+        return None
+    if not isinstance(repeat, dict):
+        raise ValueError(f"{where}.repeat must be an object with count and pitch")
+
+    count = repeat.get("count")
+    if isinstance(count, bool) or not isinstance(count, int) or not 1 <= count <= MAX_INSTANCES:
+        raise ValueError(f"{where}.repeat.count must be an integer from 1 to {MAX_INSTANCES}, got {count!r}")
+
+    pitch = repeat.get("pitch")
+    if (not isinstance(pitch, list) or len(pitch) != 3
+            or not all(_finite(value) for value in pitch)):
+        raise ValueError(f"{where}.repeat.pitch must be [dx, dy, dz], got {pitch!r}")
+    return count, tuple(float(value) for value in pitch)
+
+
+def _items(spec, key):
+    items = spec.get(key, [])
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise ValueError(f"{key} must be a list of objects")
+    return items
+
+
+def _finite(value):
+    return not isinstance(value, bool) and isinstance(value, (int, float)) and math.isfinite(value)
+
+
+def _number(item, key, where, positive=False, default=None):
+    value = item.get(key, default)
+    if not _finite(value):
+        raise ValueError(f"{where}.{key} must be a finite number, got {value!r}")
+    if positive and value <= 0:
+        raise ValueError(f"{where}.{key} must be positive, got {value!r}")
+    return float(value)
+
+
+def _color(item, primitive, where):
+    # [r, g, b] or [r, g, b, a] in 0..1; alpha is ignored
+    color = item.get("color")
+    if color is None or color == []:
+        return DEFAULT_COLORS[primitive]
+    if (not isinstance(color, list) or not 3 <= len(color) <= 4
+            or not all(_finite(c) for c in color)):
+        raise ValueError(f"{where}.color must be a list of 3 or 4 numbers, got {color!r}")
+    rgb = [int(round(255 * min(max(float(c), 0.0), 1.0))) for c in color[:3]]
+    return (rgb[0], rgb[1], rgb[2], 255)
+
+
+def _position(item, where, on_axis):
+    # Units sit on the x axis; components may give y and a base elevation z
+    x = _number(item, "x", where)
+    if on_axis:
+        return x, 0.0, 0.0
+    return x, _number(item, "y", where, default=0), _number(item, "z", where, default=0)
+
+
+def _solid(item, where, on_axis):
+    shape = item.get("shape")
+    x, y, z = _position(item, where, on_axis)
+
+    if shape == "cylinder":
+        radius = _number(item, "radius", where, positive=True)
+        height = _number(item, "height", where, positive=True)
+        dims = (radius, radius, height)
+    elif shape == "box":
+        dims = (_number(item, "width", where, positive=True),
+                _number(item, "depth", where, positive=True),
+                _number(item, "height", where, positive=True))
+    else:
+        raise ValueError(f"{where}.shape must be cylinder or box, got {shape!r}")
+
+    # Unit templates are centered on the origin; z is the base elevation
+    return (shape, dims, np.eye(3), (x, y, z + dims[2] / 2), _color(item, shape, where), None)
+
+
+def _straight_pipe(item, where):
+    # Engine pipes run along x, centered on (x, y, z)
+    radius = _number(item, "radius", where, positive=True)
+    length = _number(item, "length", where, positive=True)
+    x, y, z = _position(item, where, on_axis=False)
+    return ("pipe", (radius, radius, length), X_AXIS, (x, y, z), _color(item, "pipe", where), None)
+
+
+def _half_width(unit):
+    return unit["radius"] if unit.get("shape") == "cylinder" else unit.get("width", 0) / 2
+
+
+def _connection(connection, units, where):
+    a = connection.get("from")
+    b = connection.get("to")
+    if not all(isinstance(i, int) and not isinstance(i, bool) and 0 <= i < len(units)
+               for i in (a, b)):
+        raise ValueError(f"{where} must reference units 0..{len(units) - 1}, got {a!r} -> {b!r}")
+
+    radius = _number(connection, "radius", where, positive=True)
+    z = _number(connection, "z", where, default=0)
+
+    # Shell to shell along x, so pipes do not run through the tanks
+    start = units[a]["x"] + _half_width(units[a])
+    end = units[b]["x"] - _half_width(units[b])
+    if end < start:
+        start, end = end, start
+    if end - start < 1e-6:
+        return None
+
+    return ("pipe", (radius, radius, end - start), X_AXIS,
+            ((start + end) / 2, 0.0, z), _color(connection, "pipe", where), None)
+
+
+# ============================================================
+# PLAN CACHE
+# ============================================================
+
+class PlanCache:
+    """Validated plans keyed by spec hash, bounded LRU"""
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, spec):
+        key = spec_hash(spec)
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                self.hits += 1
+                return key, plan
+            self.misses += 1
+
+        plan = compile_spec(spec)
+
+        with self._lock:
+            self._plans[key] = plan
+            while len(self._plans) > self.max_entries:
+                self._plans.popitem(last=False)
+        return key, plan
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "plans": len(self._plans)}
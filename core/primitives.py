@@ -0,0 +1,184 @@
+import math
+import numpy as np
+import trimesh
+
+
+def sections_for_radius(radius, tolerance, minimum=8, maximum=128, step=4):
+    """Fewest polygon sections whose chordal deviation stays within tolerance"""
+    if radius <= tolerance:
+        return minimum
+
+    # Chord sagitta for n sections: r * (1 - cos(pi / n)) <= tolerance
+    sections = math.pi / math.acos(1 - tolerance / radius)
+
+    # Round up to a multiple of step so nearby radii share one template
+    sections = step * math.ceil(sections / step)
+    return int(min(max(sections, minimum), maximum))
+
+
+def hemisphere(sections):
+    """Open unit hemisphere (z >= 0) with sections around and sections/4 rings"""
+    rings = max(2, sections // 4)
+
+    theta = np.linspace(0, 2 * np.pi, sections, endpoint=False)
+    phi = np.linspace(0, np.pi / 2, rings, endpoint=False)
+
+    ring_r = np.cos(phi)[:, None]
+    vertices = np.column_stack([
+        (ring_r * np.cos(theta)).ravel(),
+        (ring_r * np.sin(theta)).ravel(),
+        np.repeat(np.sin(phi), sections)
+    ])
+    vertices = np.vstack([vertices, [0, 0, 1]])
+
+    # Quads between neighbouring rings, split into two triangles each
+    ring = np.arange(rings - 1)[:, None] * sections
+    i = np.arange(sections)[None, :]
+    j = (i + 1) % sections
+    a = (ring + i).ravel()
+    b = (ring + j).ravel()
+    c = (ring + sections + j).ravel()
+    d = (ring + sections + i).ravel()
+    quads = np.vstack([np.column_stack([a, b, c]), np.column_stack([a, c, d])])
+
+    # Fan from the last ring to the pole
+    top = (rings - 1) * sections
+    pole = len(vertices) - 1
+    fan = np.column_stack([top + np.arange(sections),
+                           top + (np.arange(sections) + 1) % sections,
+                           np.full(sections, pole)])
+
+    return trimesh.Trimesh(vertices=vertices, faces=np.vstack([quads, fan]), process=False)
+
+
+def align_z(directions):
+    """Batch of rotation matrices taking +z onto each unit direction (n, 3, 3)"""
+    directions = np.asarray(directions, dtype=np.float64).reshape(-1, 3)
+    n = len(directions)
+    c = directions[:, 2]
+
+    # Rodrigues with axis z x d: R = I + K + K^2 / (1 + c)
+    k = np.zeros((n, 3, 3))
+    k[:, 0, 2] = directions[:, 0]
+    k[:, 1, 2] = directions[:, 1]
+    k[:, 2, 0] = -directions[:, 0]
+    k[:, 2, 1] = -directions[:, 1]
+
+    rotations = np.tile(np.eye(3), (n, 1, 1))
+    regular = c > -1 + 1e-9
+    rotations[regular] += (k[regular]
+                           + (k[regular] @ k[regular]) / (1 + c[regular])[:, None, None])
+
+    # Anti-parallel: half turn about x
+    rotations[~regular] = np.diag([1.0, -1.0, -1.0])
+    return rotations
+
+
+class PrimitiveCache:
+    """Unit primitives tessellated once, instanced with a scale and a transform"""
+
+    def __init__(self):
+        self._templates = {}
+        self.hits = 0
+        self.misses = 0
+
+    # ============================================================
+    # TEMPLATES
+    # ============================================================
+
+    def template(self, kind, level):
+        key = (kind, level)
+        mesh = self._templates.get(key)
+
+        if mesh is None:
+            self.misses += 1
+            mesh = self._build(kind, level)
+            self._templates[key] = mesh
+        else:
+            self.hits += 1
+
+        return mesh
+
+    def _build(self, kind, level):
+
+        # Unit cylinder: radius 1, height 1, centered on the origin
+        if kind == "cylinder":
+            return trimesh.creation.cylinder(radius=1.0, height=1.0, sections=level)
+
+        # Unit box: extents 1, centered on the origin (level is unused)
+        if kind == "box":
+            return trimesh.creation.box(extents=[1.0, 1.0, 1.0])
+
+        # Unit dome: true hemisphere, no flattened lower half
+        if kind == "hemisphere":
+            return hemisphere(level)
+
+        # Unit elbow: torus for a pipe of radius 1
+        if kind == "torus":
+            major_sections, minor_sections = level
+            return trimesh.creation.torus(
+                major_radius=2.5,
+                minor_radius=1.0,
+                major_sections=major_sections,
+                minor_sections=minor_sections
+            )
+
+        # Unit nozzle: stub, neck and flange for a pipe of radius 1
+        if kind == "nozzle":
+            stub = trimesh.creation.cylinder(radius=1.05, height=3, sections=level)
+            flange = trimesh.creation.cylinder(radius=1.8, height=0.6, sections=level)
+            flange.apply_translation([0, 0, 3])
+            neck = trimesh.creation.cylinder(radius=1.3, height=1, sections=level)
+            neck.apply_translation([0, 0, 2])
+            return trimesh.util.concatenate([stub, neck, flange])
+
+        raise ValueError(f"Unknown primitive kind: {kind}")
+
+    # ============================================================
+    # INSTANCES
+    # ============================================================
+
+    def instance(self, kind, level, scale=1.0, transform=None):
+        template = self.template(kind, level)
+
+        # Placement as one matrix: transform @ diag(scale)
+        matrix = np.eye(4)
+        matrix[:3, :3] = np.diag(np.broadcast_to(np.asarray(scale, dtype=np.float64), (3,)))
+        if transform is not None:
+            matrix = np.asarray(transform, dtype=np.float64) @ matrix
+
+        vertices = template.vertices @ matrix[:3, :3].T + matrix[:3, 3]
+
+        mesh = trimesh.Trimesh(vertices=vertices,
+                               faces=template.faces.copy(),
+                               process=False)
+        # Writers that instance templates (core.gltf) read this back
+        mesh.metadata["templates"] = [(template, matrix)]
+        return mesh
+
+    def instances(self, kind, level, linear, translations):
+        # Many instances of one template in a single pass: vertices are
+        # linear[i] @ v + translations[i]; one template lookup per batch
+        template = self.template(kind, level)
+        linear = np.asarray(linear, dtype=np.float64).reshape(-1, 3, 3)
+        translations = np.asarray(translations, dtype=np.float64).reshape(-1, 3)
+
+        vertices = np.einsum("nij,mj->nmi", linear, template.vertices) + translations[:, None, :]
+        faces = (template.faces[None, :, :]
+                 + (np.arange(len(linear)) * len(template.vertices))[:, None, None])
+
+        return vertices.reshape(-1, 3), faces.reshape(-1, 3)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "templates": len(self._templates),
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+    def clear(self):
+        self._templates.clear()
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,186 @@
+import re
+import sys
+from functools import lru_cache
+
+
+NUMBER = r"(\d+(?:\.\d+)?)"
+
+# One alternation, scanned once: explicit primitives first so their
+# numbers are not picked up as counts
+TOKEN = re.compile(
+    rf"(?P<cylinder>cylinder\s+r={NUMBER}\s+h={NUMBER}\s+at\s+x={NUMBER})"
+    rf"|(?P<box>box\s+w={NUMBER}\s+d={NUMBER}\s+h={NUMBER}\s+at\s+x={NUMBER})"
+    rf"|(?P<number>\d+(?:\.\d+)?)"
+    rf"|(?P<word>[a-z]+)(?P<assign>\s*=)?"
+)
+
+# Substrings that select a plant kind, highest priority first. Like the
+# original "in prompt_lower" checks they match anywhere inside a word
+# ("incomplete", "prefilters"); "all units" and "x=" are handled in _parse
+KIND_WORDS = (
+    ("complete", ("complete", "full")),
+    ("intake", ("intake",)),
+    ("clarifier", ("clarifier",)),
+    ("filter", ("filter",)),
+    ("storage", ("storage", "tank")),
+    ("explicit", ("position",))
+)
+
+# Only these characters may sit between a keyword and its count
+COUNT_GAP = re.compile(r"[:\s]*")
+
+
+class ParsedPrompt:
+    """Everything core.engine and the generator read from a prompt.
+
+    capacity is the number before "MLD" (None if absent; callers pick their
+    own default), counts maps each word to the number right after it
+    ("filters: 6"), in prompt order; number() matches a keyword at the end
+    of such a word, as the original keyword regex did. cylinders and boxes
+    are the explicit primitives as (r, h, x) and (w, d, h, x) in prompt
+    order. Instances are cached and shared, so treat them as read-only.
+    """
+
+    def __init__(self, capacity, counts, cylinders, boxes, kind):
+        self.capacity = capacity
+        self.counts = counts
+        self.cylinders = cylinders
+        self.boxes = boxes
+        self.kind = kind
+
+    def number(self, keyword, default):
+        keyword = keyword.lower()
+        return next((value for word, value in self.counts.items() if word.endswith(keyword)),
+                    default)
+
+
+def normalize_prompt(prompt):
+    return " ".join((prompt or "").lower().split())
+
+
+def parse_prompt(prompt):
+    return _parse(normalize_prompt(prompt))
+
+
+@lru_cache(maxsize=1024)
+def _parse(prompt):
+    capacity = None
+    counts = {}
+    cylinders = []
+    boxes = []
+    hits = set()
+
+    word = None
+    word_end = 0
+    previous = None
+    previous_end = 0
+    number = None
+    number_end = 0
+
+    for match in TOKEN.finditer(prompt):
+        kind = match.lastgroup if match.lastgroup != "assign" else "word"
+
+        if kind == "cylinder":
+            cylinders.append(tuple(float(v) for v in match.group(2, 3, 4)))
+            hits.add("explicit")
+        elif kind == "box":
+            boxes.append(tuple(float(v) for v in match.group(6, 7, 8, 9)))
+            hits.add("explicit")
+        elif kind == "number":
+            value = float(match.group("number"))
+            # First number straight after a keyword is its count
+            if word and word not in counts and COUNT_GAP.fullmatch(prompt, word_end, match.start()):
+                counts[word] = value
+            number, number_end = value, match.end()
+            word = None
+            continue
+        else:
+            text = match.group("word")
+            # "100 MLD", "100mld": the first capacity wins
+            if (capacity is None and number is not None and text.startswith("mld")
+                    and not prompt[number_end:match.start()].strip()):
+                capacity = int(number) if number.is_integer() else number
+            # "all units" and "x=" as substrings: "ball units", "max=3"
+            if (text.startswith("units") and previous and previous.endswith("all")
+                    and prompt[previous_end:match.start()] == " "):
+                hits.add("complete")
+            if text.endswith("x") and prompt.startswith("=", match.end("word")):
+                hits.add("explicit")
+            for plant_kind, stems in KIND_WORDS:
+                if any(stem in text for stem in stems):
+                    hits.add(plant_kind)
+            word, word_end = text, match.end("word")
+            previous, previous_end = word, word_end
+            number = None
+            continue
+
+        word = None
+        number = None
+
+    kind = next((k for k, _ in KIND_WORDS if k in hits), "basic")
+    return ParsedPrompt(capacity, counts, tuple(cylinders), tuple(boxes), kind)
+
+
+def cache_info():
+    return _parse.cache_info()
+
+
+# ============================================================
+# EQUIVALENCE CHECK
+# ============================================================
+
+def _legacy(prompt):
+    # The per-call regexes and "in" checks core.engine used before this
+    # parser: (capacity, filters, kind)
+    lower = prompt.lower()
+    mld = re.search(r"(\d+)\s*MLD", prompt, re.IGNORECASE)
+    filters = re.search(r"filters[:\s]*(\d+(?:\.\d+)?)", prompt, re.IGNORECASE)
+
+    if "complete" in lower or "full" in lower or "all units" in lower:
+        kind = "complete"
+    elif "intake" in lower:
+        kind = "intake"
+    elif "clarifier" in lower:
+        kind = "clarifier"
+    elif "filter" in lower:
+        kind = "filter"
+    elif "storage" in lower or "tank" in lower:
+        kind = "storage"
+    elif any(x in lower for x in ["at x=", "position", "x="]):
+        kind = "explicit"
+    else:
+        kind = "basic"
+
+    return (int(mld.group(1)) if mld else 10,
+            float(filters.group(1)) if filters else 4,
+            kind)
+
+
+# Known differences, not sampled: decimal capacities ("2.5 MLD" reads 2.5,
+# not 5), an x= value directly before "MLD" ("at x=0 MLD") is not a
+# capacity, and whitespace inside "all units" is collapsed before matching
+SAMPLE_PROMPTS = [
+    "100 MLD WTP", "150mld plant", "Complete 50 MLD plant", "incomplete plant",
+    "full treatment", "carefully sized plant", "all units at 20 MLD", "ball units",
+    "intake structure", "Clarifier 30 MLD", "filter bank", "filters: 6",
+    "prefilters 6 filter", "Filters 12.5", "filters = 3", "storage tank 10 MLD",
+    "tanker bay", "max=3 plant", "positions for units", "x = 4",
+    "cylinder r=5 h=10 at x=0 box w=4 d=4 h=6 at x=20", "no keywords here", ""
+]
+
+
+if __name__ == "__main__":
+    # python -m core.prompt: parser vs the legacy regexes on sample prompts
+    failures = 0
+    for sample in SAMPLE_PROMPTS:
+        parsed = parse_prompt(sample)
+        current = (parsed.capacity if parsed.capacity is not None else 10,
+                   parsed.number("filters", 4),
+                   parsed.kind)
+        expected = _legacy(sample)
+        if current != expected:
+            failures += 1
+            print(f"❌ {sample!r}: {current} != legacy {expected}")
+
+    print(f"{len(SAMPLE_PROMPTS) - failures}/{len(SAMPLE_PROMPTS)} prompts match the legacy parser")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,164 @@
+import os
+import json
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from .workers import BuildTimeout, OutputTooLarge, QueueFull
+
+
+# Route -> (output key, content type); the other format is skipped at build time
+ROUTES = {
+    "/model.glb": ("glb", "model/gltf-binary"),
+    "/model.stl": ("stl", "model/stl")
+}
+
+MAX_BODY_BYTES = 1024 * 1024
+
+# Every response is built whole in memory: cap what one request can ask for
+MAX_TRAINS = int(os.getenv("WTP_API_MAX_TRAINS", "100"))
+MAX_RESPONSE_BYTES = int(os.getenv("WTP_API_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+# ============================================================
+# HANDLER
+# ============================================================
+
+class ModelHandler(BaseHTTPRequestHandler):
+    """Headless bytes API over SimpleCADGenerator.generate_bytes.
+
+        GET  /model.glb?prompt=150+MLD+WTP[&quantize=1]
+        POST /model.stl   {"prompt": "...", "params": {...}}
+        GET  /health
+
+    Models are built and streamed from memory; nothing is written to disk.
+    Requests past MAX_TRAINS get a 400, outputs past MAX_RESPONSE_BYTES a
+    413. get_generator is called per request, so the server can listen
+    before the generator (and trimesh) is loaded.
+    """
+
+    get_generator = None
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/health":
+            return self._json(200, {"status": "ok"})
+
+        query = parse_qs(url.query)
+        params = {}
+        if query.get("quantize", ["0"])[0] == "1":
+            params["glb_quantize"] = True
+        self._model(url.path, query.get("prompt", [""])[0], params)
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            return self._json(413, {"error": f"Body exceeds {MAX_BODY_BYTES} bytes"})
+
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(body, dict):
+                raise ValueError("Body must be a JSON object")
+        except ValueError as e:
+            return self._json(400, {"error": f"Invalid JSON: {e}"})
+
+        self._model(url.path, str(body.get("prompt", "")), body.get("params") or {})
+
+    def _model(self, path, prompt, params):
+        if path not in ROUTES:
+            return self._json(404, {"error": f"Unknown path: {path}"})
+        if not isinstance(params, dict):
+            return self._json(400, {"error": "params must be a JSON object"})
+
+        output, content_type = ROUTES[path]
+        params = dict(params, formats=["glb", "stl"] if output == "stl" else ["glb"])
+
+        try:
+            result = self.get_generator().generate_bytes(params, prompt,
+                                                         max_trains=MAX_TRAINS,
+                                                         max_bytes=MAX_RESPONSE_BYTES)
+        except OutputTooLarge as e:
+            return self._json(413, {"error": str(e)})
+        except QueueFull as e:
+            return self._json(503, {"error": str(e)})
+        except BuildTimeout as e:
+            return self._json(504, {"error": str(e)})
+        except ValueError as e:
+            return self._json(400, {"error": str(e)})
+        except Exception as e:
+            print("ERROR:", str(e))
+            return self._json(500, {"error": str(e)})
+
+        data = memoryview(result[output])
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(data.nbytes))
+        self.send_header("Content-Disposition", f'attachment; filename="wtp_{result["key"][:12]}.{output}"')
+        self.send_header("X-Triangles", str(result["triangles"]))
+        self.send_header("X-Design-Key", result["key"])
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _json(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Requests are already logged by the generator's RequestLog
+        pass
+
+
+# ============================================================
+# SERVER
+# ============================================================
+
+def make_server(get_generator, host="127.0.0.1", port=7861):
+    handler = type("Handler", (ModelHandler,), {"get_generator": staticmethod(get_generator)})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve_in_background(get_generator, host=None, port=None):
+    # Next to the Gradio UI, opt-in: only when WTP_API_PORT is set (and not
+    # 0). The API is unauthenticated, so it binds to localhost unless
+    # WTP_API_HOST says otherwise
+    port = int(os.getenv("WTP_API_PORT") or 0) if port is None else port
+    if not port:
+        return None
+    host = host or os.getenv("WTP_API_HOST", "127.0.0.1")
+
+    server = make_server(get_generator, host, port)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="wtp-api", daemon=True).start()
+    return server
+
+
+def _get_generator():
+    # Imports core.generator (numpy, trimesh) on first call
+    from .generator import get_generator
+    return get_generator()
+
+
+if __name__ == "__main__":
+    # python -m core.server [--port 7861]
+    parser = argparse.ArgumentParser(description="Headless GLB/STL bytes API")
+    parser.add_argument("--host", default=os.getenv("WTP_API_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("WTP_API_PORT", "7861")))
+    args = parser.parse_args()
+
+    server = make_server(_get_generator, args.host, args.port)
+    print(f"🌐 Serving models on http://{args.host}:{args.port}/model.glb")
+
+    # Listening first, then load and pre-tessellate in the background
+    threading.Thread(target=lambda: print(f"🔥 Warm-up: {_get_generator().warm_up():.2f}s"),
+                     name="wtp-warm-up", daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
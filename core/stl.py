@@ -0,0 +1,93 @@
+import os
+import struct
+import numpy as np
+
+
+# One binary STL record: normal, three vertices, attribute byte count (50 bytes)
+STL_DTYPE = np.dtype([
+    ("normal", "<f4", (3,)),
+    ("vertices", "<f4", (3, 3)),
+    ("attributes", "<u2")
+])
+
+
+STL_HEADER = b"AI WTP Architect binary STL"
+
+
+def fill_records(records, vertices, faces):
+    """Write one chunk's triangles (corners and unit normals) into records"""
+    # Gather triangle corners straight into the record block
+    corners = records["vertices"]
+    np.take(np.asarray(vertices, dtype=np.float32), faces, axis=0,
+            out=corners, mode="clip")
+
+    normals = np.cross(corners[:, 1] - corners[:, 0],
+                       corners[:, 2] - corners[:, 0])
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    np.divide(normals, lengths, out=normals, where=lengths > 0)
+    records["normal"] = normals
+
+
+def stl_triangle_count(path):
+    """Triangle count from a binary STL header, without reading the body"""
+    with open(path, "rb") as f:
+        f.seek(80)
+        data = f.read(4)
+    return struct.unpack("<I", data)[0] if len(data) == 4 else 0
+
+
+class StreamingSTLWriter:
+    """Binary STL writer that appends triangles chunk by chunk.
+
+    target is a path or a seekable binary file (e.g. io.BytesIO); files
+    passed in are left open on close().
+    """
+
+    def __init__(self, target, header=STL_HEADER):
+        self.path = target if isinstance(target, (str, os.PathLike)) else None
+        self.count = 0
+        self._owned = self.path is not None
+        self._file = open(target, "wb") if self._owned else target
+        self._start = self._file.tell()
+        self._file.write(header[:80].ljust(80, b" "))
+        # Placeholder triangle count, patched in close()
+        self._file.write(struct.pack("<I", 0))
+
+        # Reused record block; grows to the largest chunk seen
+        self._records = np.zeros(0, dtype=STL_DTYPE)
+
+    def write(self, vertices, faces):
+        n = len(faces)
+        if n == 0:
+            return
+
+        if n > len(self._records):
+            self._records = np.zeros(n, dtype=STL_DTYPE)
+        records = self._records[:n]
+        fill_records(records, vertices, faces)
+
+        self._file.write(memoryview(records).cast("B"))
+        self.count += n
+
+    def write_buffer(self, buffer):
+        # Stream a GeometryBuffer, tiling instanced sub-assemblies chunk by chunk
+        for vertices, faces, _ in buffer.tiled():
+            self.write(vertices, faces)
+
+    def close(self):
+        if self._file is None or self._file.closed:
+            return
+        end = self._file.tell()
+        self._file.seek(self._start + 80)
+        self._file.write(struct.pack("<I", self.count))
+        if self._owned:
+            self._file.close()
+        else:
+            self._file.seek(end)
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
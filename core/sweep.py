@@ -0,0 +1,143 @@
+import io
+import sys
+import csv
+import json
+import math
+import argparse
+import numpy as np
+
+from .generator import SimpleCADGenerator
+from .layout import (BANK_PITCH, CLARIFIER, CLARIFIER_INLET_Z, CLARIFIER_Y, GROUND_DEPTH,
+                     GROUND_MARGIN, HEADER_LEAD, LARGE_GROUND_MARGIN, MERGE_Y, MIXER,
+                     NOZZLE_Z, OUTPUT_Y, OUTPUT_Z, RACK_DROP, RACK_HEIGHT, RACK_Y,
+                     ROUTE_CLEARANCE, ROUTE_Z, STORAGE, STORAGE_INLET_Z, STORAGE_OFFSET,
+                     TRAIN_SPACING, TRUNK_OFFSET)
+
+
+# train_assembly pipes: rack drop, vertical, run to the mixer nozzle,
+# mixer -> clarifier, clarifier -> filter
+TRAIN_PIPE = (RACK_DROP + (RACK_HEIGHT - NOZZLE_Z) + (RACK_Y - RACK_DROP)
+              + math.hypot(CLARIFIER_Y, NOZZLE_Z - CLARIFIER_INLET_Z)
+              + math.hypot(OUTPUT_Y - CLARIFIER_Y, CLARIFIER_INLET_Z - OUTPUT_Z))
+
+# route_to_storage: rise, diagonal run over to the storage tank, final drop
+ROUTE_PIPE = ((ROUTE_Z - OUTPUT_Z)
+              + math.hypot(STORAGE_OFFSET - STORAGE[0] - ROUTE_CLEARANCE, -MERGE_Y)
+              + math.hypot(ROUTE_CLEARANCE, ROUTE_Z - STORAGE_INLET_Z))
+
+COLUMNS = ["mld", "layout", "trains", "banks", "scale",
+           "footprint_length", "footprint_width", "footprint_area",
+           "pipe_length", "mixer_volume", "clarifier_volume",
+           "storage_volume", "tank_volume"]
+
+
+def train_counts(mld):
+    # Vectorized SimpleCADGenerator.train_count
+    return 1 + np.digitize(mld, [50, 150, 300], right=True)
+
+
+def sweep(capacities, layout="standard",
+          train_capacity_mld=SimpleCADGenerator.LARGE_TRAIN_MLD,
+          trains_per_bank=SimpleCADGenerator.LARGE_TRAINS_PER_BANK):
+    """Closed-form plant quantities for every capacity, no meshes built.
+
+    Returns a dict of equal-length NumPy columns (see COLUMNS). Lengths and
+    areas are in model units, volumes are tank body volumes (domes
+    excluded), all matching what build_3d_model would lay out.
+    """
+    mld = np.asarray(capacities, dtype=np.float64).ravel()
+
+    if layout == "standard":
+        trains = train_counts(mld)
+        scale = np.maximum(1, mld / 80)
+        banks = np.ones_like(trains)
+        row_trains = trains
+
+        length = (TRAIN_SPACING * trains + GROUND_MARGIN) * scale
+        width = GROUND_DEPTH * scale
+
+        # Main header, then one drop per train (plus the merge header when
+        # there is more than one train), then the run to storage
+        header = TRAIN_SPACING * (trains - 1) + HEADER_LEAD
+        outputs = (OUTPUT_Y - MERGE_Y) * trains + TRAIN_SPACING * (trains - 1)
+        pipe = (header + TRAIN_PIPE * trains + outputs + ROUTE_PIPE) * scale
+
+    elif layout == "large":
+        if train_capacity_mld <= 0 or trains_per_bank < 1:
+            raise ValueError("train_capacity_mld and trains_per_bank must be positive")
+
+        trains = np.ceil(mld / train_capacity_mld).astype(int)
+        if trains.size and not (1 <= trains.min() and trains.max() <= SimpleCADGenerator.MAX_TRAINS):
+            raise ValueError(f"Large-plant mode supports 1 to {SimpleCADGenerator.MAX_TRAINS} trains")
+
+        scale = np.full_like(mld, max(1, train_capacity_mld / 80))
+        banks = -(-trains // trains_per_bank)
+        row_trains = np.minimum(trains, trains_per_bank)
+
+        length = (TRAIN_SPACING * row_trains + LARGE_GROUND_MARGIN) * scale
+        width = (GROUND_DEPTH + BANK_PITCH * (banks - 1)) * scale
+
+        # Per bank: raw-water header and merge header out to the trunk;
+        # per train: assembly pipes and outfall; trunk joins the banks
+        headers = TRAIN_SPACING * (trains - banks) + HEADER_LEAD * banks
+        merges = (TRAIN_SPACING * (row_trains - 1) + TRUNK_OFFSET) * banks
+        outfalls = (OUTPUT_Y - MERGE_Y) * trains
+        trunk = BANK_PITCH * (banks - 1)
+        pipe = (headers + merges + TRAIN_PIPE * trains + outfalls + trunk + ROUTE_PIPE) * scale
+
+    else:
+        raise ValueError(f"Unknown layout: {layout}")
+
+    mixer = math.pi * MIXER[0] ** 2 * MIXER[1] * trains * scale ** 3
+    clarifier = math.pi * CLARIFIER[0] ** 2 * CLARIFIER[1] * trains * scale ** 3
+    storage = math.pi * STORAGE[0] ** 2 * STORAGE[1] * scale ** 3
+
+    return {
+        "mld": mld,
+        "layout": np.full(mld.shape, layout),
+        "trains": trains,
+        "banks": banks,
+        "scale": scale,
+        "footprint_length": length,
+        "footprint_width": width,
+        "footprint_area": length * width,
+        "pipe_length": pipe,
+        "mixer_volume": mixer,
+        "clarifier_volume": clarifier,
+        "storage_volume": storage,
+        "tank_volume": mixer + clarifier + storage
+    }
+
+
+def rows(table):
+    columns = [table[name].tolist() for name in COLUMNS]
+    return [dict(zip(COLUMNS, values)) for values in zip(*columns)]
+
+
+def to_csv(table):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(COLUMNS)
+    writer.writerows(zip(*(table[name].tolist() for name in COLUMNS)))
+    return out.getvalue()
+
+
+def to_json(table):
+    return json.dumps(rows(table), separators=(",", ":"))
+
+
+if __name__ == "__main__":
+    # python -m core.sweep 10 2000 --step 10 [--layout large] [--format json]
+    parser = argparse.ArgumentParser(description="Analytic design-space sweep")
+    parser.add_argument("start", type=float)
+    parser.add_argument("stop", type=float)
+    parser.add_argument("--step", type=float, default=10)
+    parser.add_argument("--layout", choices=["standard", "large"], default="standard")
+    parser.add_argument("--train-capacity", type=float, default=SimpleCADGenerator.LARGE_TRAIN_MLD)
+    parser.add_argument("--trains-per-bank", type=int, default=SimpleCADGenerator.LARGE_TRAINS_PER_BANK)
+    parser.add_argument("--format", choices=["csv", "json"], default="csv")
+    args = parser.parse_args()
+
+    table = sweep(np.arange(args.start, args.stop + args.step / 2, args.step),
+                  args.layout, args.train_capacity, args.trains_per_bank)
+    sys.stdout.write(to_csv(table) if args.format == "csv" else to_json(table) + "\n")
@@ -0,0 +1,126 @@
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import threading
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """Wall-clock seconds per pipeline stage; repeated stages accumulate"""
+
+    def __init__(self):
+        self.stages = {}
+        self.started = time.perf_counter()
+        self._last = self.started
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(name, time.perf_counter() - start)
+
+    def lap(self, name):
+        # Time since the previous lap (or construction) goes to this stage
+        now = time.perf_counter()
+        self._add(name, now - self._last)
+
+    def _add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+        self._last = time.perf_counter()
+
+    def rounded(self, digits=6):
+        return {name: round(seconds, digits) for name, seconds in self.stages.items()}
+
+
+class RequestLog:
+    """Append-only JSON Lines log, one record per generation request.
+
+    append() only queues the line; a background thread does the file I/O,
+    so requests never wait on the disk. flush() waits for queued lines.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._writer = None
+
+    def append(self, record):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        if self._writer is None:
+            self._start()
+        self._queue.put(line)
+
+    def _start(self):
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write, name="wtp-request-log",
+                                                daemon=True)
+                self._writer.start()
+                atexit.register(self.flush)
+
+    def _write(self):
+        while True:
+            lines = [self._queue.get()]
+            # Whatever queued up meanwhile goes out in the same append
+            while True:
+                try:
+                    lines.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.writelines(lines)
+            except OSError as e:
+                print("⚠️ Request log:", e)
+            finally:
+                for _ in lines:
+                    self._queue.task_done()
+
+    def flush(self):
+        self._queue.join()
+
+    def records(self):
+        self.flush()
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+    def summary(self):
+        """p50/p99 latency in seconds per stage, over every logged build"""
+        samples = {}
+        for record in self.records():
+            for name, seconds in record.get("stages", {}).items():
+                samples.setdefault(name, []).append(seconds)
+            samples.setdefault("total", []).append(record.get("total_s", 0.0))
+
+        return {name: {"count": len(values),
+                       "p50": percentile(values, 50),
+                       "p99": percentile(values, 99)}
+                for name, values in samples.items()}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-pct * len(ordered) // 100))
+    return ordered[int(rank) - 1]
+
+
+if __name__ == "__main__":
+    # python -m core.telemetry [path/to/requests.jsonl]
+    path = sys.argv[1] if len(sys.argv) > 1 else "requests.jsonl"
+    for name, row in RequestLog(path).summary().items():
+        print(f"{name:>16}  n={row['count']:<6} p50={row['p50'] * 1000:9.2f} ms  "
+              f"p99={row['p99'] * 1000:9.2f} ms")
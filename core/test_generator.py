@@ -0,0 +1,137 @@
+import glob
+import os
+import threading
+
+import pytest
+
+from . import generator as generator_module
+from .generator import SimpleCADGenerator
+
+
+@pytest.fixture
+def generator(tmp_path):
+    return SimpleCADGenerator(export_dir=str(tmp_path), check_clashes=False)
+
+
+# ============================================================
+# TRIANGLE BUDGET
+# ============================================================
+
+def test_budget_miss_is_reported(generator):
+    # No tessellation gets a plant down to 10 triangles
+    result = generator.generate({"triangle_budget": 10}, "50 MLD")
+
+    assert result["triangles"] > 10
+    assert result["triangle_budget"] == 10
+    assert result["over_budget"] is True
+    assert result["tolerance"] > generator.chord_tolerance
+    assert result["proxy"] is None
+
+    generator.request_log.flush()
+    line = list(generator.request_log.records())[-1]
+    assert line["over_budget"] is True
+    assert line["tolerance"] == result["tolerance"]
+
+
+def test_budget_met_by_coarsening(generator):
+    full = generator.generate({}, "300 MLD")
+    budget = full["triangles"] // 2
+    result = generator.generate({"triangle_budget": budget}, "300 MLD")
+
+    assert result["triangles"] <= budget
+    assert result["over_budget"] is False
+    assert result["tolerance"] > generator.chord_tolerance
+
+
+def test_proxies_cut_a_missed_budget(generator):
+    plain = generator.generate({"triangle_budget": 10}, "50 MLD")
+    proxied = generator.generate({"triangle_budget": 10, "proxies": True}, "50 MLD")
+
+    assert proxied["proxy"] == "train"
+    assert proxied["triangles"] < plain["triangles"]
+    assert proxied["over_budget"] is True
+
+
+def test_preview_of_largest_plant_fits_its_budget(generator):
+    level, preview = next(generator.generate_lods({"large_plant": True, "trains": 1000},
+                                                  "large plant"))
+
+    assert level == "preview"
+    assert preview["triangles"] <= preview["triangle_budget"]
+    assert preview["over_budget"] is False
+    assert preview["proxy"] == "bank"
+
+
+# ============================================================
+# PARAMETER VALIDATION
+# ============================================================
+
+@pytest.mark.parametrize("formats", ["glb", ["stl"], ["glb", "obj"], [], None])
+def test_invalid_formats_rejected(generator, formats):
+    with pytest.raises(ValueError, match="formats"):
+        generator.design_params("50 MLD", {"formats": formats})
+
+
+def test_formats_normalized(generator):
+    params = generator.design_params("50 MLD", {"formats": ["stl", "glb", "glb"]})
+    assert params["formats"] == ["glb", "stl"]
+
+
+@pytest.mark.parametrize("trains", [0, -3, 2.5, True, "4", None])
+def test_invalid_trains_rejected(generator, trains):
+    with pytest.raises(ValueError, match="trains"):
+        generator.design_params("large plant", {"large_plant": True, "trains": trains})
+
+
+def test_trains_above_limit_rejected(generator):
+    with pytest.raises(ValueError, match="1 to"):
+        generator.design_params("large plant",
+                                {"large_plant": True, "trains": generator.MAX_TRAINS + 1})
+
+
+@pytest.mark.parametrize("key", ["train_capacity_mld", "trains_per_bank"])
+def test_invalid_bank_layout_rejected(generator, key):
+    with pytest.raises(ValueError, match=key):
+        generator.design_params("large plant", {"large_plant": True, key: 0})
+
+
+# ============================================================
+# STREAMING
+# ============================================================
+
+def test_closed_stream_leaves_no_partials(generator):
+    stream = generator.generate_stream({}, "300 MLD")
+    level, partial = next(stream)
+    assert level == "partial"
+    stem = partial["glb"][:-len(f"_{partial['stage']}.glb")]
+
+    # A cancelled request: the first level still finishes in the background
+    stream.close()
+    for thread in threading.enumerate():
+        if thread.name == "wtp-stream":
+            thread.join()
+
+    assert glob.glob(f"{stem}_*.glb") == []
+
+
+def test_consumed_stream_leaves_no_partials(generator):
+    partials = [result["glb"] for level, result in generator.generate_stream({}, "300 MLD")
+                if level == "partial"]
+
+    assert partials
+    assert not any(os.path.exists(path) for path in partials)
+
+
+# ============================================================
+# SHARED INSTANCE
+# ============================================================
+
+def test_shared_generator_rejects_other_options(tmp_path, monkeypatch):
+    monkeypatch.setattr(generator_module, "_generator", None)
+    monkeypatch.setattr(generator_module, "_generator_options", None)
+
+    shared = generator_module.get_generator(export_dir=str(tmp_path))
+    assert generator_module.get_generator() is shared
+    assert generator_module.get_generator(export_dir=str(tmp_path)) is shared
+    with pytest.raises(ValueError, match="shared generator"):
+        generator_module.get_generator(export_dir=str(tmp_path / "other"))
@@ -0,0 +1,47 @@
+import pytest
+
+from .plan import DEFAULT_COLORS, compile_spec
+
+
+def spec(color=None, connection=None):
+    unit = {"shape": "cylinder", "x": 0, "radius": 10, "height": 20}
+    if color is not None:
+        unit["color"] = color
+    units = [unit, {"shape": "box", "x": 100, "width": 20, "depth": 20, "height": 10}]
+    return {"units": units,
+            "connections": [connection or {"from": 0, "to": 1, "radius": 2}]}
+
+
+def unit_color(plan):
+    return next(entry[4] for entry in plan.entries if entry[0] == "cylinder")
+
+
+@pytest.mark.parametrize("color", [[], None])
+def test_missing_color_uses_default(color):
+    assert unit_color(compile_spec(spec(color))) == DEFAULT_COLORS["cylinder"]
+
+
+@pytest.mark.parametrize("color, rgba", [
+    ([1, 0, 0], (255, 0, 0, 255)),
+    ([0, 0.5, 1, 0.2], (0, 128, 255, 255)),
+    ([2, -1, 0], (255, 0, 0, 255))
+])
+def test_color_scaled_and_clamped(color, rgba):
+    assert unit_color(compile_spec(spec(color))) == rgba
+
+
+@pytest.mark.parametrize("color", [
+    "red", 0.5, [1, 0], [1, 0, 0, 1, 0], [1, "0", 0], [1, None, 0],
+    [True, 0, 0], [float("nan"), 0, 0], [float("inf"), 0, 0], {"r": 1}
+])
+def test_invalid_color_rejected(color):
+    with pytest.raises(ValueError, match=r"units\[0\]\.color"):
+        compile_spec(spec(color))
+
+
+@pytest.mark.parametrize("ends", [(0, 2), (-1, 1), (True, 1), (0, False), ("0", 1), (0, None),
+                                  (0.0, 1)])
+def test_invalid_connection_rejected(ends):
+    connection = {"from": ends[0], "to": ends[1], "radius": 2}
+    with pytest.raises(ValueError, match=r"connections\[0\]"):
+        compile_spec(spec(connection=connection))
@@ -0,0 +1,179 @@
+import os
+import time
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+
+class QueueFull(RuntimeError):
+    pass
+
+
+class BuildTimeout(RuntimeError):
+    pass
+
+
+class OutputTooLarge(ValueError):
+    pass
+
+
+# ============================================================
+# PROCESS CONTEXT
+# ============================================================
+
+def process_context():
+    # Pools start lazily from request threads; forking a threaded process
+    # can deadlock, so workers fork from a single-threaded forkserver that
+    # has already imported the generator (spawn where there is none).
+    # Each worker still imports the entry script as __mp_main__, so that
+    # script must keep heavy work behind a __main__ check
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload([f"{__package__}.generator"])
+    return context
+
+
+# ============================================================
+# WORKER PROCESS
+# ============================================================
+
+_worker = None
+
+
+def _init_worker(export_dir):
+    # Runs once per worker: import trimesh/numpy and tessellate templates
+    global _worker
+    from .generator import SimpleCADGenerator
+    # The pool already spreads builds over the cores: no nested tiling pool
+    _worker = SimpleCADGenerator(export_dir=export_dir, build_processes=1)
+    _worker.warm_up()
+
+
+def _ping():
+    return os.getpid()
+
+
+def _build(params, stem, events=None):
+    # Partial previews go back to the caller over a manager queue
+    progress = (lambda *event: events.put(event)) if events is not None else None
+    return _worker._build(params, stem, progress)
+
+
+def _build_bytes(params, max_bytes=None):
+    return _worker._build_bytes(params, max_bytes)
+
+
+# ============================================================
+# POOL BACKEND
+# ============================================================
+
+class BuildPool:
+    """Process-pool backend for SimpleCADGenerator with a bounded request queue"""
+
+    def __init__(self, export_dir=None, workers=None, max_queue=16, timeout=120):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.timeout = timeout
+
+        self._context = process_context()
+        self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=self._context,
+                                             initializer=_init_worker,
+                                             initargs=(export_dir,))
+
+        # Running builds plus waiting builds; admission fails past this
+        self.capacity = self.workers + self.max_queue
+        self._lock = threading.Lock()
+        self._pending = 0
+
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+        # Started on the first streamed build
+        self._sync = None
+
+    @classmethod
+    def from_env(cls, export_dir=None):
+        return cls(export_dir,
+                   workers=int(os.getenv("WTP_WORKERS", "0")) or None,
+                   max_queue=int(os.getenv("WTP_QUEUE_SIZE", "16")),
+                   timeout=float(os.getenv("WTP_BUILD_TIMEOUT", "120")))
+
+    def warm(self):
+        # Start every worker now, before the server accepts requests
+        futures = [self._executor.submit(_ping) for _ in range(self.workers)]
+        return sorted({f.result() for f in futures})
+
+    def build(self, params, stem, progress=None):
+        if progress is None:
+            return self._run(_build, params, stem)
+        events = self._manager().Queue()
+        return self._run(_build, params, stem, events, events=events, progress=progress)
+
+    def build_bytes(self, params, max_bytes=None):
+        # Outputs come back pickled through the pool, never via disk
+        return self._run(_build_bytes, params, max_bytes)
+
+    def _run(self, fn, *args, events=None, progress=None):
+        with self._lock:
+            if self._pending >= self.capacity:
+                self.rejected += 1
+                raise QueueFull(f"Build queue is full ({self._pending}/{self.capacity})")
+            self._pending += 1
+
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._release)
+
+        deadline = time.monotonic() + self.timeout
+        try:
+            if progress is not None:
+                # Relay partial previews in this thread while the worker builds
+                while not future.done() and time.monotonic() < deadline:
+                    try:
+                        progress(*events.get(timeout=0.05))
+                    except queue.Empty:
+                        pass
+                while not events.empty():
+                    progress(*events.get())
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeout:
+            future.cancel()
+            with self._lock:
+                self.timeouts += 1
+            raise BuildTimeout(f"Build exceeded {self.timeout:g}s")
+
+    def _manager(self):
+        with self._lock:
+            if self._sync is None:
+                self._sync = self._context.Manager()
+            return self._sync
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+            if not future.cancelled():
+                self.completed += 1
+
+    def depth(self):
+        with self._lock:
+            return self._pending
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "depth": self._pending,
+                "capacity": self.capacity,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._sync is not None:
+            self._sync.shutdown()
@@ -0,0 +1,68 @@
+"""
+Memory ceiling check for large-plant mode.
+
+Builds a large plant (default: 200 trains, 10 per bank) and fails when the
+peak RSS growth over the post-import baseline exceeds the budget. Only one
+train mesh is held in memory and the STL is streamed train by train, so the
+growth should stay roughly constant whatever the train count.
+
+    python memory_ceiling.py
+    python memory_ceiling.py --trains 500 --budget-mb 96
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+
+from core.generator import SimpleCADGenerator
+
+
+def peak_rss_mb():
+    # ru_maxrss is reported in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Large-plant memory ceiling check")
+    parser.add_argument("--trains", type=int, default=200)
+    parser.add_argument("--trains-per-bank", type=int, default=10)
+    parser.add_argument("--budget-mb", type=float, default=64)
+    args = parser.parse_args()
+
+    export_dir = tempfile.mkdtemp(prefix="wtp_memcheck_")
+    try:
+        generator = SimpleCADGenerator(export_dir=export_dir)
+        generator.warm_up()
+        baseline = peak_rss_mb()
+
+        start = time.perf_counter()
+        glb_path, stl_path = generator.build_3d_model({
+            "large_plant": True,
+            "trains": args.trains,
+            "trains_per_bank": args.trains_per_bank
+        })
+        elapsed = time.perf_counter() - start
+        growth = peak_rss_mb() - baseline
+
+        print(f"Trains:      {args.trains}")
+        print(f"Build time:  {elapsed:.2f} s")
+        print(f"GLB size:    {os.path.getsize(glb_path) / 1e6:.1f} MB")
+        print(f"STL size:    {os.path.getsize(stl_path) / 1e6:.1f} MB")
+        print(f"RSS growth:  {growth:.1f} MB (budget {args.budget_mb:g} MB)")
+
+        if growth > args.budget_mb:
+            print("❌ Memory ceiling exceeded")
+            return 1
+
+        print("✅ Within memory ceiling")
+        return 0
+
+    finally:
+        shutil.rmtree(export_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())